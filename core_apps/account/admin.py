@@ -1,5 +1,5 @@
 from django.contrib import admin
-from core_apps.account.models import Account, KYC, Debt, DebtPayment
+from core_apps.account.models import Account, KYC, Debt, DebtAccrual, DebtPayment
 from import_export.admin import ImportExportModelAdmin
 
 
@@ -58,7 +58,7 @@ class DebtAdmin(admin.ModelAdmin):
             )
         }),
         ('Dates', {
-            'fields': ('due_date', 'created_at', 'updated_at')
+            'fields': ('due_date', 'funded_on', 'last_accrued_on', 'last_debited_on', 'created_at', 'updated_at')
         }),
     )
     
@@ -107,6 +107,28 @@ class DebtPaymentAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         return qs.select_related('debt__account__user__kyc')
 
+@admin.register(DebtAccrual)
+class DebtAccrualAdmin(admin.ModelAdmin):
+    list_display = [
+        'debt',
+        'amount',
+        'interest_rate',
+        'period_start',
+        'period_end',
+        'created_at'
+    ]
+    list_filter = ['period_end']
+    search_fields = [
+        'debt__account__account_number',
+        'debt__account__user__kyc__full_name'
+    ]
+    readonly_fields = ['debt', 'amount', 'interest_rate', 'period_start', 'period_end', 'created_at']
+    list_per_page = 20
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.select_related('debt__account__user__kyc')
+
 # Optional: If you want to see debt information in the Account admin
 from core_apps.account.models import Account
 
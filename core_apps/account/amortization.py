@@ -0,0 +1,109 @@
+"""
+Projected repayment schedule for a debt.
+
+The schedule spreads what is left of the debt over level monthly
+installments ending on its due date, at interest_rate percent a year, and
+is the same payment run_autodebit collects. It only changes when the debt
+does, so it is cached under the debt's updated_at; accrual, auto-debit and
+admin edits all bump updated_at, which moves the key. The day is part of
+the key too, because installments drop off as months pass.
+"""
+from decimal import ROUND_HALF_UP, ROUND_UP, Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+
+def cache_ttl():
+    return getattr(settings, "AMORTIZATION_CACHE_TTL", 24 * 60 * 60)
+
+
+def installments_left(today, due_date):
+    """Monthly installments from this month up to the due date, at least one"""
+    months = (due_date.year - today.year) * 12 + due_date.month - today.month
+    if due_date.day >= today.day:
+        months += 1
+    return max(months, 1)
+
+
+def monthly_payment(principal, annual_rate, months):
+    """Level payment that repays principal in months at annual_rate percent, rounded up to the cent"""
+    principal = Decimal(principal)
+    rate = Decimal(annual_rate) / 100 / 12
+    if months <= 1:
+        return principal
+    if rate == 0:
+        payment = principal / months
+    else:
+        payment = principal * rate / (1 - (1 + rate) ** -months)
+    return min(payment.quantize(CENT, rounding=ROUND_UP), principal)
+
+
+def build(principal, annual_rate, due_date, today):
+    """Schedule of level installments clearing principal by due_date; the last one absorbs rounding"""
+    months = installments_left(today, due_date) if due_date > today else 1
+    rate = Decimal(annual_rate) / 100 / 12
+    payment = monthly_payment(principal, annual_rate, months)
+    balance = Decimal(principal)
+    rows = []
+    for number in range(1, months + 1):
+        interest = (balance * rate).quantize(CENT, rounding=ROUND_HALF_UP) if months > 1 else ZERO
+        amount = balance + interest if number == months else min(payment, balance + interest)
+        balance = balance + interest - amount
+        rows.append({
+            "number": number,
+            "date": max(due_date - relativedelta(months=months - number), today),
+            "payment": amount,
+            "interest": interest,
+            "principal": amount - interest,
+            "balance": balance,
+        })
+    return {
+        "installment": payment,
+        "installments": months,
+        "total_interest": sum((row["interest"] for row in rows), ZERO),
+        "total_paid": sum((row["payment"] for row in rows), ZERO),
+        "rows": rows,
+    }
+
+
+def cache_key(debt, today):
+    return f"amortization:{debt.pk}:{debt.updated_at.timestamp()}:{today.isoformat()}"
+
+
+def for_debt(debt, today=None):
+    """Schedule for what is left of debt, or None if it has no due date or nothing left to pay"""
+    if debt is None or debt.due_date is None or debt.remaining_amount <= 0:
+        return None
+    today = today or timezone.localdate()
+    key = cache_key(debt, today)
+    schedule = cache.get(key)
+    if schedule is None:
+        schedule = build(debt.remaining_amount, debt.interest_rate, debt.due_date, today)
+        cache.set(key, schedule, cache_ttl())
+    return schedule
+
+
+def as_json(schedule):
+    return {
+        "installment": str(schedule["installment"]),
+        "installments": schedule["installments"],
+        "total_interest": str(schedule["total_interest"]),
+        "total_paid": str(schedule["total_paid"]),
+        "rows": [
+            {
+                "number": row["number"],
+                "date": row["date"].isoformat(),
+                "payment": str(row["payment"]),
+                "interest": str(row["interest"]),
+                "principal": str(row["principal"]),
+                "balance": str(row["balance"]),
+            }
+            for row in schedule["rows"]
+        ],
+    }
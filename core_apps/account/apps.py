@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save
 
 
 class AccountConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core_apps.account'
+
+    def ready(self):
+        from core_apps.account import directory
+        from core_apps.account.models import KYC, Account
+        from core_apps.userauths.models import User
+
+        post_save.connect(directory.sync_account, sender=Account, dispatch_uid="directory_sync_account")
+        post_save.connect(directory.sync_kyc, sender=KYC, dispatch_uid="directory_sync_kyc")
+        post_save.connect(directory.sync_user, sender=User, dispatch_uid="directory_sync_user")
@@ -0,0 +1,103 @@
+from functools import wraps
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import ObjectDoesNotExist
+from django.shortcuts import redirect
+from django.utils.functional import cached_property
+
+# Everything a signed-in page needs about its user, fetched with the user itself
+USER_RELATED = ("kyc", "account", "account__debt")
+
+
+def load_user(user_id):
+    """The user with KYC, Account and Debt joined in, one query"""
+    return get_user_model()._default_manager.select_related(*USER_RELATED).get(pk=user_id)
+
+
+def related_or_none(obj, name):
+    if obj is None:
+        return None
+    try:
+        return getattr(obj, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+class UserContextBackend(ModelBackend):
+    """ModelBackend whose session lookup loads the user's related rows in the same query"""
+
+    def get_user(self, user_id):
+        try:
+            user = load_user(user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class UserContext:
+    """Lazy per-request view of the signed-in user's KYC, Account, Debt and entitlements"""
+
+    def __init__(self, request):
+        self.request = request
+
+    @cached_property
+    def user(self):
+        user = self.request.user
+        return user if user.is_authenticated else None
+
+    @cached_property
+    def kyc(self):
+        return related_or_none(self.user, "kyc")
+
+    @cached_property
+    def account(self):
+        return related_or_none(self.user, "account")
+
+    @cached_property
+    def debt(self):
+        return related_or_none(self.account, "debt")
+
+    @cached_property
+    def entitlements(self):
+        from core_apps.core.entitlements import for_user
+
+        return for_user(self.request.user)
+
+
+class UserContextMiddleware:
+    """Attach request.user_context; must run after AuthenticationMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_context = UserContext(request)
+        return self.get_response(request)
+
+
+def user_context(request):
+    """Context processor exposing the signed-in user's KYC and own account to every template"""
+    context = getattr(request, "user_context", None)
+    if context is None or context.user is None:
+        return {}
+    return {
+        "kyc": context.kyc,
+        "user_account": context.account,
+    }
+
+
+def kyc_required(view_func):
+    """Decorator to check if user has completed KYC"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            messages.warning(request, "You need to login to access this page.")
+            return redirect("core_apps.userauths:sign-in")
+
+        if not request.user_context.kyc:
+            messages.warning(request, "You need to complete your KYC registration to access this page.")
+            return redirect("core_apps.account:kyc-reg")
+
+        return view_func(request, *args, **kwargs)
+    return wrapper
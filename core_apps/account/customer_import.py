@@ -0,0 +1,274 @@
+"""
+Bulk customer import from a partner bank export.
+
+Rows are streamed from CSV or JSON Lines and committed a chunk at a time.
+Every chunk bulk creates its users, accounts, debts, KYC rows and directory
+entries in one transaction, so a failure never leaves half a customer behind
+and a checkpoint after each chunk lets an interrupted run pick up where it
+stopped.
+"""
+import csv
+import json
+import os
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core_apps.account import directory, provisioning
+from core_apps.account.models import ACCOUNT_STATUS, GENDER, IDENTITY_TYPE, MARITAL_STATUS, KYC, Debt
+from core_apps.userauths.models import User
+
+KYC_TEXT_FIELDS = ["country", "state", "city", "mobile", "fax"]
+ERROR_FIELDS = ["line", "email", "error"]
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_rows(path, fmt):
+    """Yield (line number, row dict) without loading the file into memory"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "jsonl":
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, RowError(f"Invalid JSON: {e}")
+                    continue
+                yield line_number, row if isinstance(row, dict) else RowError("Each line must be a JSON object.")
+        else:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or "email" not in reader.fieldnames:
+                raise ValueError("CSV import needs an email column.")
+            # Line 1 is the header
+            for line_number, row in enumerate(reader, start=2):
+                yield line_number, row
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def text(row, name):
+    return str(row.get(name) or "").strip()
+
+
+def decimal(row, name):
+    value = text(row, name)
+    if not value:
+        return Decimal("0.00")
+    try:
+        return Decimal(value).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise RowError(f"Invalid {name}: {value}")
+
+
+def choice(row, name, choices, default):
+    value = text(row, name).lower() or default
+    if value not in dict(choices):
+        raise RowError(f"Invalid {name}: {value}")
+    return value
+
+
+def password(row, hash_plaintext):
+    """
+    Hashed password for the imported user.
+
+    Pre-hashed Django passwords are kept as they are. Plain-text passwords
+    are only hashed with --hash-passwords, since a full-strength hash per row
+    costs far more than the rest of the import; otherwise the user gets an
+    unusable password and signs in through a reset.
+    """
+    hashed = text(row, "password_hash")
+    if hashed:
+        try:
+            identify_hasher(hashed)
+        except ValueError:
+            raise RowError("Unrecognised password_hash format.")
+        return hashed
+    plain = text(row, "password")
+    if plain and hash_plaintext:
+        return make_password(plain)
+    return make_password(None)
+
+
+def birth_date(row):
+    value = text(row, "date_of_birth")
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise RowError(f"Invalid date_of_birth: {value}")
+        parsed = datetime.combine(day, time.min)
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def clean(row, hash_plaintext=False):
+    """Validate one input row into the fields for its User, Account, Debt and KYC"""
+    if isinstance(row, RowError):
+        raise row
+
+    email = text(row, "email").lower()
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise RowError(f"Invalid email: {email or '(blank)'}")
+
+    full_name = text(row, "full_name")
+    date_of_birth = birth_date(row)
+    debt_total = decimal(row, "debt_total")
+    due_date = text(row, "debt_due_date")
+
+    cleaned = {
+        "user": {
+            "email": email,
+            "username": text(row, "username") or email.split("@")[0],
+            "first_name": text(row, "first_name"),
+            "last_name": text(row, "last_name"),
+            "password": password(row, hash_plaintext),
+        },
+        "account": {
+            "account_balance": decimal(row, "account_balance"),
+            "account_status": choice(row, "account_status", ACCOUNT_STATUS, "active"),
+            "kyc_submitted": bool(full_name),
+            "kyc_confirmed": bool(full_name),
+        },
+        "debt": {
+            "debt_type": choice(row, "debt_type", Debt.DEBT_TYPES, "personal"),
+            "total_amount": debt_total,
+            "remaining_amount": decimal(row, "debt_remaining") if text(row, "debt_remaining") else debt_total,
+            "interest_rate": decimal(row, "debt_interest_rate"),
+            "due_date": parse_date(due_date) if due_date else None,
+        },
+        "kyc": None,
+    }
+    if due_date and cleaned["debt"]["due_date"] is None:
+        raise RowError(f"Invalid debt_due_date: {due_date}")
+
+    if full_name:
+        if date_of_birth is None:
+            raise RowError("KYC rows need a date_of_birth.")
+        cleaned["kyc"] = {
+            "full_name": full_name,
+            "date_of_birth": date_of_birth,
+            "gender": choice(row, "gender", GENDER, "other"),
+            "marital_status": choice(row, "marital_status", MARITAL_STATUS, "other"),
+            "identity_type": choice(row, "identity_type", IDENTITY_TYPE, "national_id_card"),
+            **{name: text(row, name) for name in KYC_TEXT_FIELDS},
+        }
+    return cleaned
+
+
+def import_chunk(rows, hash_plaintext=False, batch_size=1000):
+    """
+    Create one chunk of customers; returns (created, [(line, email, error)]).
+
+    Emails already in the database are reported and skipped, which is also
+    what makes re-running a chunk after a crash harmless. If the chunk still
+    hits a unique constraint, it is retried a row at a time and only the
+    rows that fail are reported.
+    """
+    errors = []
+    valid = {}
+    for line_number, row in rows:
+        try:
+            cleaned = clean(row, hash_plaintext)
+        except RowError as e:
+            errors.append((line_number, text(row, "email") if isinstance(row, dict) else "", str(e)))
+            continue
+        email = cleaned["user"]["email"]
+        if email in valid:
+            errors.append((line_number, email, "Duplicate email in file."))
+            continue
+        valid[email] = (line_number, cleaned)
+
+    for email in User.objects.filter(email__in=list(valid)).values_list("email", flat=True):
+        line_number, _ = valid.pop(email)
+        errors.append((line_number, email, "A user with this email already exists."))
+
+    if not valid:
+        return 0, errors
+
+    customers = list(valid.values())
+    try:
+        created = create_customers(customers, batch_size)
+    except IntegrityError:
+        # A concurrent signup or a clashing username; retry row by row to find the offenders
+        created = 0
+        for line_number, cleaned in customers:
+            try:
+                created += create_customers([(line_number, cleaned)], batch_size)
+            except IntegrityError as e:
+                errors.append((line_number, cleaned["user"]["email"], f"Could not be created: {e}"))
+
+    return created, errors
+
+
+def create_customers(customers, batch_size=1000):
+    """Insert (line, cleaned) customers in one transaction; returns how many were created"""
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            [User(**cleaned["user"]) for _, cleaned in customers],
+            batch_size=batch_size,
+        )
+        by_user = {user.pk: cleaned for user, (_, cleaned) in zip(users, customers)}
+        # The directory is synced once the KYC rows carrying the names exist
+        accounts = provisioning.provision_accounts(
+            users,
+            batch_size=batch_size,
+            account_fields={pk: cleaned["account"] for pk, cleaned in by_user.items()},
+            debt_fields={pk: cleaned["debt"] for pk, cleaned in by_user.items()},
+            sync=False,
+        )
+
+        KYC.objects.bulk_create(
+            [
+                KYC(user_id=account.user_id, account=account, **by_user[account.user_id]["kyc"])
+                for account in accounts
+                if by_user[account.user_id]["kyc"]
+            ],
+            batch_size=batch_size,
+        )
+
+        directory.sync([account.pk for account in accounts])
+
+    return len(users)
+
+
+def load_checkpoint(path, source):
+    """Rows already committed from source; raises ValueError if the checkpoint belongs to another file"""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        saved = json.load(f)
+    if saved.get("source") != os.path.abspath(source):
+        raise ValueError(
+            f"Checkpoint {path} was written for {saved.get('source')}, not {os.path.abspath(source)}. "
+            "Pass --restart or a different --checkpoint."
+        )
+    return saved.get("rows_done", 0)
+
+
+def save_checkpoint(path, source, rows_done):
+    """Atomically record how many input rows are committed"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump({"source": os.path.abspath(source), "rows_done": rows_done}, f)
+    os.replace(temporary, path)
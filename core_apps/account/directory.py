@@ -0,0 +1,159 @@
+"""
+Account search backed by the AccountDirectory table.
+
+Queries of three or more characters match anywhere in the name, email or
+account number through a trigram index (FTS5 on SQLite, pg_trgm on
+Postgres). Shorter queries fall back to prefix matches on the *_key
+columns. Nothing here joins Account, User or KYC at search time.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from core_apps.account import thumbnails
+from core_apps.account.models import Account, AccountDirectory
+
+# Trigram indexes cannot match anything shorter than a trigram
+MIN_SUBSTRING = 3
+
+SYNCED_FIELDS = ["user", "full_name", "email", "account_number", "image", "image_hash", "name_key", "email_key", "number_key", "search_text"]
+
+
+def page_size():
+    return getattr(settings, "ACCOUNT_SEARCH_PAGE_SIZE", 20)
+
+
+def autocomplete_size():
+    return getattr(settings, "ACCOUNT_AUTOCOMPLETE_SIZE", 8)
+
+
+def normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+def sync(account_ids):
+    """Upsert the directory rows for these accounts from Account, User and KYC"""
+    rows = Account.objects.filter(pk__in=account_ids).values(
+        "pk", "user_id", "account_number", "account_id", "user__email", "user__kyc__full_name", "user__kyc__image", "user__kyc__image_hash",
+    )
+    entries = []
+    for row in rows:
+        full_name = row["user__kyc__full_name"] or ""
+        email = row["user__email"] or ""
+        entries.append(AccountDirectory(
+            account_id=row["pk"],
+            user_id=row["user_id"],
+            full_name=full_name,
+            email=email,
+            account_number=row["account_number"],
+            image=row["user__kyc__image"] or "",
+            image_hash=row["user__kyc__image_hash"] or "",
+            name_key=normalize(full_name),
+            email_key=email.lower(),
+            number_key=row["account_number"].lower(),
+            search_text=" ".join(filter(None, [normalize(full_name), email.lower(), row["account_number"].lower(), row["account_id"].lower()])),
+        ))
+    AccountDirectory.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=["account"],
+        update_fields=SYNCED_FIELDS,
+    )
+
+
+# Account and User columns copied into the directory
+ACCOUNT_FIELDS = {"account_number", "account_id", "user"}
+USER_FIELDS = {"email"}
+
+
+def sync_account(sender, instance, created, **kwargs):
+    if created or ACCOUNT_FIELDS.intersection(instance.get_dirty_fields()):
+        sync([instance.pk])
+
+
+def sync_user(sender, instance, created, update_fields=None, **kwargs):
+    # Created users are picked up when their account is created
+    if created or (update_fields is not None and not USER_FIELDS.intersection(update_fields)):
+        return
+    stale = AccountDirectory.objects.filter(user_id=instance.pk).exclude(email=instance.email)
+    sync(stale.values_list("account_id", flat=True))
+
+
+def sync_kyc(sender, instance, **kwargs):
+    sync(Account.objects.filter(user_id=instance.user_id).values_list("pk", flat=True))
+
+
+def rebuild(chunk_size=1000):
+    """Resync every account in pk-ordered chunks; returns how many were synced"""
+    last_pk = None
+    synced = 0
+    while True:
+        accounts = Account.objects.order_by("pk")
+        if last_pk is not None:
+            accounts = accounts.filter(pk__gt=last_pk)
+        chunk = list(accounts.values_list("pk", flat=True)[:chunk_size])
+        if not chunk:
+            break
+        sync(chunk)
+        last_pk = chunk[-1]
+        synced += len(chunk)
+
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO account_directory_fts(account_directory_fts) VALUES ('rebuild')")
+    return synced
+
+
+def prefix(field, text):
+    """Range form of startswith, which every backend can answer from a plain B-tree index"""
+    return Q(**{f"{field}__gte": text, f"{field}__lt": text + "\uffff"})
+
+
+def matching(text):
+    if len(text) < MIN_SUBSTRING:
+        return prefix("name_key", text) | prefix("email_key", text) | prefix("number_key", text)
+
+    if connection.vendor == "sqlite":
+        phrase = '"' + text.replace('"', '""') + '"'
+        return Q(id__in=RawSQL("SELECT rowid FROM account_directory_fts WHERE account_directory_fts MATCH %s", [phrase]))
+    # LIKE '%text%', which Postgres serves from the pg_trgm GIN index
+    return Q(search_text__contains=text)
+
+
+def search(query, exclude_user=None, page=1, size=None, ordered=True):
+    """
+    One page of directory rows matching query, and whether another page follows.
+
+    ordered=False skips sorting by name so the database can stop at the
+    first size matches, which is what autocomplete wants.
+    """
+    text = normalize(query)
+    if not text:
+        return [], False
+
+    size = size or page_size()
+    page = max(page, 1)
+    rows = AccountDirectory.objects.filter(matching(text))
+    if exclude_user is not None:
+        rows = rows.exclude(user=exclude_user)
+    if ordered:
+        rows = rows.order_by("name_key", "id")
+
+    start = (page - 1) * size
+    rows = list(rows[start:start + size + 1])
+    return rows[:size], len(rows) > size
+
+
+def mask(account_number):
+    """Account number with all but the last four digits hidden"""
+    return "*" * max(len(account_number) - 4, 0) + account_number[-4:]
+
+
+def as_json(entry):
+    # Suggestions go to any verified user, so they carry no email and only a masked number
+    return {
+        "account_number": mask(entry.account_number),
+        "full_name": entry.full_name,
+        "image": thumbnails.url(entry.image, entry.image_hash, 40),
+    }
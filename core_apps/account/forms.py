@@ -1,13 +1,14 @@
 from django import forms
 from core_apps.account.models import KYC
 from django.forms import ImageField, FileInput, DateInput
+from core_apps.core.uploads import DeferredUploadsMixin
 
 class DateInput(forms.DateInput):
     """Help user select date."""
     input_type = 'date'
 
 
-class KYCForm(forms.ModelForm):
+class KYCForm(DeferredUploadsMixin, forms.ModelForm):
     identity_image = ImageField(widget=FileInput)
     image = ImageField(widget=FileInput)
     signature = ImageField(widget=FileInput)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core_apps.account import accrual
+
+
+class Command(BaseCommand):
+    help = "Add daily interest to every interest-bearing debt, then mark paid and overdue debts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", help="Accrue up to this ISO date instead of today")
+        parser.add_argument("--chunk-size", type=int, default=None)
+        parser.add_argument("--sweep-only", action="store_true", help="Only update paid and overdue statuses")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options["as_of"]:
+            as_of = parse_date(options["as_of"])
+            if as_of is None:
+                raise CommandError("--as-of must be an ISO date.")
+
+        started = time.monotonic()
+        if not options["sweep_only"]:
+            accrued, total = accrual.accrue(as_of, size=options["chunk_size"])
+            self.stdout.write(f"Accrued {total} interest on {accrued} debts.")
+        paid, overdue = accrual.sweep_statuses(as_of)
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked {paid} debts paid and {overdue} overdue in {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,27 @@
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+
+from core_apps.account import thumbnails
+from core_apps.account.models import KYC
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnails for KYC images uploaded before thumbnails existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retry-failed", action="store_true", help="Also retry images previously marked unreadable")
+
+    def handle(self, *args, **options):
+        pending = [""] + ([thumbnails.FAILED] if options["retry_failed"] else [])
+        names = KYC.objects.filter(image_hash__in=pending).exclude(image="").values_list("image", flat=True).distinct()
+        # The default image's hash is precomputed, so its rows never show up as pending
+        processed = failed = 0
+        for name in chain([thumbnails.DEFAULT_IMAGE], names.iterator()):
+            try:
+                thumbnails.process_stored(name)
+                processed += 1
+            except thumbnails.IMAGE_ERRORS as e:
+                failed += 1
+                self.stderr.write(f"{name}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} images, {failed} failed."))
@@ -0,0 +1,76 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_apps.account.customer_import import (
+    ERROR_FIELDS, chunks, import_chunk, load_checkpoint, read_rows, save_checkpoint,
+)
+
+
+class Command(BaseCommand):
+    help = "Bulk import customers with their accounts, debts and KYC from CSV or JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file, one customer per row")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows validated and committed together")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT")
+        parser.add_argument("--checkpoint", help="Progress file; defaults to <path>.checkpoint")
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+        parser.add_argument("--errors", help="Write rejected rows to this CSV file")
+        parser.add_argument(
+            "--hash-passwords",
+            action="store_true",
+            help="Hash plain-text password columns (slow); otherwise those users get an unusable password",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv")
+        checkpoint = options["checkpoint"] or f"{path}.checkpoint"
+        try:
+            skip = 0 if options["restart"] else load_checkpoint(checkpoint, path)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if skip:
+            self.stdout.write(f"Resuming after {skip:,} rows.")
+
+        errors_file = open(options["errors"], "a" if skip else "w", newline="") if options["errors"] else None
+        error_writer = csv.writer(errors_file) if errors_file else None
+        if error_writer and not skip:
+            error_writer.writerow(ERROR_FIELDS)
+
+        rows_done, created, rejected = skip, 0, 0
+        started = time.monotonic()
+        try:
+            rows = read_rows(path, fmt)
+            for _ in range(skip):
+                next(rows, None)
+
+            for chunk in chunks(rows, options["chunk_size"]):
+                chunk_created, chunk_errors = import_chunk(
+                    chunk,
+                    hash_plaintext=options["hash_passwords"],
+                    batch_size=options["batch_size"],
+                )
+                rows_done += len(chunk)
+                created += chunk_created
+                rejected += len(chunk_errors)
+                save_checkpoint(checkpoint, path, rows_done)
+
+                if error_writer:
+                    error_writer.writerows(chunk_errors)
+                    errors_file.flush()
+
+                rate = created / max(time.monotonic() - started, 0.001)
+                self.stdout.write(f"{rows_done:,} rows read, {created:,} customers created, {rejected:,} rejected ({rate:,.0f}/s)")
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        finally:
+            if errors_file:
+                errors_file.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {created:,} customers; {rejected:,} rows rejected."))
+        if created:
+            self.stdout.write("Run snapshot_balances --opening to carry imported balances into the ledger.")
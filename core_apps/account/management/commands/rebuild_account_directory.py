@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core_apps.account import directory
+
+
+class Command(BaseCommand):
+    help = "Rebuild the account search directory from Account, User and KYC"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        synced = directory.rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {synced} accounts."))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0008_debt_debtpayment'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='debt',
+            name='debt_type',
+            field=models.CharField(choices=[('loan', 'Loan Application'), ('grant', 'Grant Application'), ('personal', 'Charity Fee'), ('interest', 'Share Payment'), ('delivery', 'Delivery')], default='personal', max_length=20),
+        ),
+    ]
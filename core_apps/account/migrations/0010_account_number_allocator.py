@@ -0,0 +1,48 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:41
+
+from django.db import migrations, models
+import shortuuid.django_fields
+
+
+def create_account_sequence(apps, schema_editor):
+    NumberSequence = apps.get_model("account", "NumberSequence")
+    NumberSequence.objects.get_or_create(name="account")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0009_alter_debt_debt_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='account',
+            name='account_id',
+            field=models.CharField(blank=True, max_length=25, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='account',
+            name='account_number',
+            field=models.CharField(blank=True, max_length=25, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='account',
+            name='pin_number',
+            field=shortuuid.django_fields.ShortUUIDField(alphabet='1234567890', length=4, max_length=7, prefix=''),
+        ),
+        migrations.AlterField(
+            model_name='account',
+            name='ref_code',
+            field=models.CharField(blank=True, max_length=20, unique=True),
+        ),
+        migrations.RunPython(create_account_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:42
+
+import core_apps.core.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0010_account_number_allocator'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='account',
+            name='id',
+            field=models.UUIDField(default=core_apps.core.ids.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
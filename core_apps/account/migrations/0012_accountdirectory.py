@@ -0,0 +1,114 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE account_directory_fts USING fts5(
+        search_text, content='account_accountdirectory', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER account_directory_fts_insert AFTER INSERT ON account_accountdirectory BEGIN
+        INSERT INTO account_directory_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    """CREATE TRIGGER account_directory_fts_delete AFTER DELETE ON account_accountdirectory BEGIN
+        INSERT INTO account_directory_fts(account_directory_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END""",
+    """CREATE TRIGGER account_directory_fts_update AFTER UPDATE ON account_accountdirectory BEGIN
+        INSERT INTO account_directory_fts(account_directory_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO account_directory_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS account_directory_fts_update",
+    "DROP TRIGGER IF EXISTS account_directory_fts_delete",
+    "DROP TRIGGER IF EXISTS account_directory_fts_insert",
+    "DROP TABLE IF EXISTS account_directory_fts",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX account_directory_trgm_idx ON account_accountdirectory USING gin (search_text gin_trgm_ops)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS account_directory_trgm_idx",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+def backfill(apps, schema_editor):
+    """Seed the directory with every existing account; the FTS triggers index each row as it lands"""
+    Account = apps.get_model("account", "Account")
+    AccountDirectory = apps.get_model("account", "AccountDirectory")
+    db_alias = schema_editor.connection.alias
+    last_pk = None
+    while True:
+        accounts = Account.objects.using(db_alias).order_by("pk")
+        if last_pk is not None:
+            accounts = accounts.filter(pk__gt=last_pk)
+        rows = list(accounts.values(
+            "pk", "user_id", "account_number", "account_id", "user__email", "user__kyc__full_name", "user__kyc__image",
+        )[:1000])
+        if not rows:
+            return
+
+        entries = []
+        for row in rows:
+            full_name = row["user__kyc__full_name"] or ""
+            name_key = " ".join(full_name.lower().split())
+            email = row["user__email"] or ""
+            entries.append(AccountDirectory(
+                account_id=row["pk"],
+                user_id=row["user_id"],
+                full_name=full_name,
+                email=email,
+                account_number=row["account_number"],
+                image=row["user__kyc__image"] or "",
+                name_key=name_key,
+                email_key=email.lower(),
+                number_key=row["account_number"].lower(),
+                search_text=" ".join(filter(None, [name_key, email.lower(), row["account_number"].lower(), row["account_id"].lower()])),
+            ))
+        AccountDirectory.objects.using(db_alias).bulk_create(entries)
+        last_pk = rows[-1]["pk"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('account', '0011_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDirectory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('full_name', models.CharField(blank=True, max_length=1000)),
+                ('email', models.CharField(blank=True, max_length=254)),
+                ('account_number', models.CharField(max_length=25)),
+                ('image', models.CharField(blank=True, max_length=255)),
+                ('name_key', models.CharField(blank=True, db_index=True, max_length=1000)),
+                ('email_key', models.CharField(blank=True, db_index=True, max_length=254)),
+                ('number_key', models.CharField(db_index=True, max_length=25)),
+                ('search_text', models.TextField(blank=True)),
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='directory_entry', to='account.account')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(
+            run_for_vendor({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            run_for_vendor({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
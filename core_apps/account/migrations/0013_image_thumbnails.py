@@ -0,0 +1,23 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0012_accountdirectory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountdirectory',
+            name='image_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='kyc',
+            name='image_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
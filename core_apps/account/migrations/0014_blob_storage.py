@@ -0,0 +1,29 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:57
+
+import core_apps.core.blobstore
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0013_image_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='kyc',
+            name='identity_image',
+            field=models.ImageField(blank=True, null=True, storage=core_apps.core.blobstore.get_storage, upload_to='kyc'),
+        ),
+        migrations.AlterField(
+            model_name='kyc',
+            name='image',
+            field=models.ImageField(default='default.jpg', storage=core_apps.core.blobstore.get_storage, upload_to='kyc'),
+        ),
+        migrations.AlterField(
+            model_name='kyc',
+            name='signature',
+            field=models.ImageField(default='default.jpg', storage=core_apps.core.blobstore.get_storage, upload_to='kyc'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.2 on 2026-10-17 01:09
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def start_accruing_today(apps, schema_editor):
+    """Existing debts accrue from the day this ships, not back to when they were created"""
+    Debt = apps.get_model("account", "Debt")
+    Debt.objects.using(schema_editor.connection.alias).filter(last_accrued_on__isnull=True).update(
+        last_accrued_on=timezone.localdate(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0014_blob_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='debt',
+            name='last_accrued_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_accruing_today, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='DebtAccrual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('interest_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('debt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accruals', to='account.debt')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='debtaccrual',
+            constraint=models.UniqueConstraint(fields=('debt', 'period_end'), name='debt_accrual_period_unique'),
+        ),
+    ]
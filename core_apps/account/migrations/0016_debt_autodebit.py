@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-17 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0015_debt_accruals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='debt',
+            name='last_debited_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
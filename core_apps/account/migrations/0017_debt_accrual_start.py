@@ -0,0 +1,26 @@
+# Generated by Django 4.2.2 on 2026-10-17 03:05
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def start_unstarted_debts(apps, schema_editor):
+    """Interest-bearing debts saved before save() set last_accrued_on start accruing today"""
+    Debt = apps.get_model("account", "Debt")
+    Debt.objects.using(schema_editor.connection.alias).filter(
+        last_accrued_on__isnull=True,
+        status__in=("active", "overdue"),
+        remaining_amount__gt=0,
+        interest_rate__gt=0,
+    ).update(last_accrued_on=timezone.localdate())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0016_debt_autodebit'),
+    ]
+
+    operations = [
+        migrations.RunPython(start_unstarted_debts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.2 on 2026-10-17 03:20
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def fund_from_creation(apps, schema_editor):
+    """Debts with a balance were funded on some unknown day; the day they were created is the best guess"""
+    Debt = apps.get_model("account", "Debt")
+    Debt.objects.using(schema_editor.connection.alias).filter(remaining_amount__gt=0).update(
+        funded_on=TruncDate("created_at"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0017_debt_accrual_start'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='debt',
+            name='funded_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(fund_from_creation, migrations.RunPython.noop),
+    ]
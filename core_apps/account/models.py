@@ -5,6 +5,10 @@ from core_apps.userauths.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from core_apps.account import numbers, thumbnails
+from core_apps.account.tracking import DirtyFieldsMixin
+from core_apps.core import blobstore
+from core_apps.core.ids import uuid7
 # from django_countries.fields import CountryField
 # from phonenumber_field.modelfields import PhoneNumberField
 
@@ -38,20 +42,29 @@ IDENTITY_TYPE = (
     ("international_passport", "International Passport"),
 )
 
+class NumberSequence(models.Model):
+    """Next unreserved value of a named counter; workers take it in blocks"""
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
 def user_directory_path(instance, filename):
     """File uploads."""
     ext = filename.split(".")[-1]
     filename = "%s_%s" % (instance.id, ext)
     return "user_{0}/{1}".format(instance.user.id, filename)
 
-class Account(models.Model):
-    id = models.UUIDField(primary_key=True, unique=True, default=uuid.uuid4, editable=False)
+class Account(DirtyFieldsMixin, models.Model):
+    id = models.UUIDField(primary_key=True, unique=True, default=uuid7, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     account_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
-    account_number = ShortUUIDField(unique=True, length=10, max_length=25, prefix="004", alphabet="1234567890")
-    account_id = ShortUUIDField(unique=True, length=7, max_length=25, prefix="DEX", alphabet="1234567890")
-    pin_number = ShortUUIDField(unique=True, length=4, max_length=7, alphabet="1234567890")
-    ref_code = ShortUUIDField(unique=True, length=10, max_length=20, alphabet="abcdefgh1234567890")
+    # Allocated from NumberSequence on first save, see core_apps.account.numbers
+    account_number = models.CharField(unique=True, max_length=25, blank=True)
+    account_id = models.CharField(unique=True, max_length=25, blank=True)
+    pin_number = ShortUUIDField(length=4, max_length=7, alphabet="1234567890")
+    ref_code = models.CharField(unique=True, max_length=20, blank=True)
     account_status = models.CharField(max_length=100, choices=ACCOUNT_STATUS, default="in-active")
     date = models.DateTimeField(auto_now_add=True)
     kyc_submitted = models.BooleanField(default=False)
@@ -64,18 +77,25 @@ class Account(models.Model):
     def __str__(self):
         return f"{self.user}"
 
+    def save(self, *args, **kwargs):
+        if not (self.account_number and self.account_id and self.ref_code):
+            numbers.assign(self)
+        super().save(*args, **kwargs)
+
 class KYC(models.Model):
     id = models.UUIDField(primary_key=True, unique=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     account = models.OneToOneField(Account, on_delete=models.CASCADE, null=True, blank=True)
     full_name = models.CharField(max_length=1000)
-    image = models.ImageField(upload_to="kyc", default="default.jpg")
+    image = models.ImageField(upload_to="kyc", default="default.jpg", storage=blobstore.get_storage)
+    # SHA-256 of the image, naming its thumbnails; see core_apps.account.thumbnails
+    image_hash = models.CharField(max_length=64, blank=True)
     marital_status = models.CharField(choices=MARITAL_STATUS, max_length=40)
     gender = models.CharField(choices=GENDER, max_length=40)
     identity_type = models.CharField(choices=IDENTITY_TYPE, max_length=140)
-    identity_image = models.ImageField(upload_to="kyc", blank=True, null=True)
+    identity_image = models.ImageField(upload_to="kyc", blank=True, null=True, storage=blobstore.get_storage)
     date_of_birth = models.DateTimeField(auto_now_add=False)
-    signature = models.ImageField(upload_to="kyc", default="default.jpg")
+    signature = models.ImageField(upload_to="kyc", default="default.jpg", storage=blobstore.get_storage)
 
     """Address"""
     country = models.CharField(max_length=1000)
@@ -90,20 +110,75 @@ class KYC(models.Model):
     def __str__(self):
         return f"{self.user}"
 
+    def save(self, *args, **kwargs):
+        # A fresh upload is still uncommitted, so thumbnails are made from it before it is stored.
+        # A reused blob already names its hash, but may never have had thumbnails made.
+        fresh = self.image and not self.image._committed
+        reused = blobstore.digest_of(self.image.name) not in ("", self.image_hash)
+        if self.image.name == thumbnails.DEFAULT_IMAGE and self.image_hash != thumbnails.DEFAULT_IMAGE_HASH:
+            self.image_hash = thumbnails.DEFAULT_IMAGE_HASH
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = set(kwargs["update_fields"]) | {"image_hash"}
+        elif fresh or reused:
+            try:
+                if fresh:
+                    self.image_hash = thumbnails.process(self.image.file)
+                else:
+                    with self.image.open("rb") as f:
+                        self.image_hash = thumbnails.process(f)
+            except thumbnails.IMAGE_ERRORS as e:
+                print(f"Thumbnail error: {e}")
+                self.image_hash = thumbnails.FAILED
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = set(kwargs["update_fields"]) | {"image_hash"}
+        super().save(*args, **kwargs)
+
+
+class AccountDirectory(models.Model):
+    """
+    Denormalised search row per account, kept in sync by core_apps.account.directory.
+
+    search_text is indexed with FTS5 (trigram) on SQLite and a pg_trgm GIN
+    index on Postgres; the *_key columns serve short prefix lookups.
+    """
+    account = models.OneToOneField(Account, on_delete=models.CASCADE, related_name="directory_entry")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    full_name = models.CharField(max_length=1000, blank=True)
+    email = models.CharField(max_length=254, blank=True)
+    account_number = models.CharField(max_length=25)
+    image = models.CharField(max_length=255, blank=True)
+    image_hash = models.CharField(max_length=64, blank=True)
+    name_key = models.CharField(max_length=1000, blank=True, db_index=True)
+    email_key = models.CharField(max_length=254, blank=True, db_index=True)
+    number_key = models.CharField(max_length=25, db_index=True)
+    search_text = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.full_name} - {self.account_number}"
+
 def create_account(sender, instance, created, **kwargs):
     """Create bank account."""
     if created:
         Account.objects.create(user=instance)
     
 def save_account(sender, instance, **kwargs):
-    """Save bank account."""
-    instance.account.save()
+    """Save bank account, if it was loaded and changed alongside the user."""
+    # An account that was never loaded cannot hold unsaved changes
+    if not User.account.is_cached(instance):
+        return
+    try:
+        account = instance.account
+    except Account.DoesNotExist:
+        return
+    dirty = account.get_dirty_fields()
+    if dirty:
+        account.save(update_fields=dirty)
 
 
 
 #DEBT PAYMENT
 
-class Debt(models.Model):
+class Debt(DirtyFieldsMixin, models.Model):
     DEBT_TYPES = (
         ('loan', 'Loan Application'),
         ('grant', 'Grant Application'),
@@ -120,6 +195,11 @@ class Debt(models.Model):
         ('overdue', 'Overdue'),
         ('settled', 'Settled'),
     )
+
+    # Statuses that earn interest; paid and settled debts do not
+    ACCRUING_STATUSES = ('active', 'overdue')
+    # Changing any of these restarts interest from the day of the change
+    ACCRUAL_TERMS = ('total_amount', 'remaining_amount', 'interest_rate')
     
     account = models.OneToOneField(
         Account, 
@@ -132,6 +212,12 @@ class Debt(models.Model):
     interest_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
     due_date = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
+    # Day the debt was funded or its total or rate last changed; set by save()
+    funded_on = models.DateField(null=True, blank=True)
+    # Day interest has been added up to; set by save() when the debt starts earning interest
+    last_accrued_on = models.DateField(null=True, blank=True)
+    # Day run_autodebit last took an installment
+    last_debited_on = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -162,12 +248,33 @@ class Debt(models.Model):
             return True
         return False
     
-    def save(self, *args, **kwargs):
+    def apply_status(self):
         """Update status based on conditions"""
         if self.remaining_amount <= 0:
             self.status = 'paid'
         elif self.is_overdue:
             self.status = 'overdue'
+        elif self.status == 'paid':
+            # A paid-off or never-funded debt that has been given a balance
+            self.status = 'active'
+
+    def start_terms(self):
+        """Date the debt's funding and interest from today when it is funded, reopened or its terms change"""
+        if self.status not in self.ACCRUING_STATUSES or self.remaining_amount <= 0:
+            return
+        today = timezone.localdate()
+        reopened = self._loaded_values.get("status") not in self.ACCRUING_STATUSES
+        changed = set(self.get_dirty_fields())
+        if self.funded_on is None or reopened or changed & {"total_amount", "interest_rate"}:
+            self.funded_on = today
+        if self.interest_rate > 0 and (self.last_accrued_on is None or reopened or changed & set(self.ACCRUAL_TERMS)):
+            self.last_accrued_on = today
+
+    def save(self, *args, **kwargs):
+        self.apply_status()
+        self.start_terms()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | {"status", "funded_on", "last_accrued_on", "updated_at"}
         super().save(*args, **kwargs)
 
 
@@ -197,6 +304,26 @@ class DebtPayment(models.Model):
         return f"Payment of ${self.amount} for {self.debt}"
 
 
+class DebtAccrual(models.Model):
+    """Interest accrue_debts added to a debt for the days after period_start up to period_end"""
+    debt = models.ForeignKey(Debt, on_delete=models.CASCADE, related_name='accruals')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    interest_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    period_start = models.DateField()
+    period_end = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # A rerun of the same night cannot add the same interest twice
+            models.UniqueConstraint(fields=["debt", "period_end"], name="debt_accrual_period_unique"),
+        ]
+
+    def __str__(self):
+        return f"Interest of ${self.amount} on {self.debt_id} to {self.period_end}"
+
+
 @receiver(post_save, sender=Account)
 def create_debt_for_account(sender, instance, created, **kwargs):
     """
@@ -208,9 +335,16 @@ def create_debt_for_account(sender, instance, created, **kwargs):
 @receiver(post_save, sender=Account)
 def save_debt_for_account(sender, instance, **kwargs):
     """
-    Signal to save Debt instance when Account is saved
+    Signal to save Debt instance when Account is saved, if it was loaded and changed
     """
-    if hasattr(instance, 'debt'):
-        instance.debt.save()
+    if not Account.debt.is_cached(instance):
+        return
+    try:
+        debt = instance.debt
+    except Debt.DoesNotExist:
+        return
+    dirty = debt.get_dirty_fields()
+    if dirty:
+        debt.save(update_fields=dirty)
 post_save.connect(create_account, sender=User)
 post_save.connect(save_account, sender=User)
\ No newline at end of file
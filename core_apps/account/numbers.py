@@ -0,0 +1,135 @@
+"""
+Account number allocation.
+
+Every account takes one value from the "account" NumberSequence and derives
+its account number, account id and referral code from it, so creating an
+account never has to check for or retry on a collision. Each process
+reserves values in blocks, which keeps the sequence row off the hot path.
+
+New numbers are one character longer than the random ones issued before
+the allocator existed, so the two can never collide.
+"""
+import os
+import threading
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+ACCOUNT_SEQUENCE = "account"
+
+ACCOUNT_NUMBER_PREFIX = "004"
+ACCOUNT_ID_PREFIX = "DEX"
+SEQUENCE_DIGITS = 10
+
+# Referral codes are shared publicly, so the value is scrambled with a
+# multiplier coprime to the code space to hide how many accounts exist
+REF_ALPHABET = "abcdefgh1234567890"
+REF_LENGTH = 11
+REF_SPACE = len(REF_ALPHABET) ** REF_LENGTH
+REF_MULTIPLIER = 26_180_411_207_723
+REF_OFFSET = 9_171_452_339
+
+_lock = threading.Lock()
+_blocks = {}
+
+
+def block_size():
+    return getattr(settings, "ACCOUNT_NUMBER_BLOCK_SIZE", 100)
+
+
+def luhn_digit(digits):
+    """Check digit that makes digits + check pass the Luhn test"""
+    total = 0
+    for position, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str((10 - total % 10) % 10)
+
+
+def luhn_valid(digits):
+    return digits.isdigit() and luhn_digit(digits[:-1]) == digits[-1]
+
+
+def format_account_number(value):
+    body = f"{ACCOUNT_NUMBER_PREFIX}{value:0{SEQUENCE_DIGITS}d}"
+    return body + luhn_digit(body)
+
+
+def format_account_id(value):
+    body = f"{value:0{SEQUENCE_DIGITS}d}"
+    return ACCOUNT_ID_PREFIX + body + luhn_digit(body)
+
+
+def format_ref_code(value):
+    scrambled = (value * REF_MULTIPLIER + REF_OFFSET) % REF_SPACE
+    chars = []
+    for _ in range(REF_LENGTH):
+        scrambled, index = divmod(scrambled, len(REF_ALPHABET))
+        chars.append(REF_ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+def is_allocated_account_number(number):
+    """True if number has the allocator's shape and a valid check digit"""
+    return (
+        len(number) == len(ACCOUNT_NUMBER_PREFIX) + SEQUENCE_DIGITS + 1
+        and number.startswith(ACCOUNT_NUMBER_PREFIX)
+        and luhn_valid(number)
+    )
+
+
+def reserve(name, size):
+    """Take size values off the named sequence and return them as a range"""
+    NumberSequence = apps.get_model("account", "NumberSequence")
+    with transaction.atomic():
+        sequence, _ = NumberSequence.objects.select_for_update().get_or_create(name=name)
+        NumberSequence.objects.filter(pk=sequence.pk).update(next_value=F("next_value") + size)
+    return range(sequence.next_value, sequence.next_value + size)
+
+
+def next_values(count, name=ACCOUNT_SEQUENCE):
+    """
+    count fresh values from the named sequence.
+
+    Outside a transaction the values come from this process's cached block.
+    Inside one, exactly count values are reserved as part of the caller's
+    transaction: a cached block would outlive a rollback that handed the
+    same values back to the sequence.
+    """
+    if connection.in_atomic_block:
+        return list(reserve(name, count))
+
+    values = []
+    with _lock:
+        while len(values) < count:
+            pid, block = _blocks.get(name, (None, range(0)))
+            # A forked worker must not keep drawing from its parent's block
+            if pid != os.getpid() or not block:
+                pid, block = os.getpid(), reserve(name, max(block_size(), count - len(values)))
+            take = min(count - len(values), len(block))
+            values.extend(block[:take])
+            _blocks[name] = (pid, block[take:])
+    return values
+
+
+def apply(account, value):
+    account.account_number = account.account_number or format_account_number(value)
+    account.account_id = account.account_id or format_account_id(value)
+    account.ref_code = account.ref_code or format_ref_code(value)
+
+
+def assign(account):
+    """Fill in account's number, id and referral code"""
+    apply(account, next_values(1)[0])
+
+
+def assign_many(accounts):
+    """assign() for accounts about to be bulk created, with a single reservation"""
+    accounts = [account for account in accounts if not (account.account_number and account.account_id and account.ref_code)]
+    for account, value in zip(accounts, next_values(len(accounts))):
+        apply(account, value)
@@ -0,0 +1,56 @@
+"""
+Bulk paths for users and accounts.
+
+bulk_create skips save() and post_save, so the Account, Debt and directory
+rows that the signals in core_apps.account.models would have made have to be
+created explicitly. These helpers do that a batch at a time.
+"""
+from core_apps.account import directory, numbers
+from core_apps.account.models import Account, Debt
+from core_apps.userauths.models import User
+
+
+def provision_accounts(users, batch_size=1000, account_fields=None, debt_fields=None, sync=True):
+    """
+    Create the missing Account, Debt and directory rows for saved users.
+
+    account_fields and debt_fields map a user pk to field values for that
+    user's new Account and Debt; users without an entry get the defaults.
+    Pass sync=False to leave the directory to the caller, for instance
+    until KYC rows exist.
+    """
+    account_fields = account_fields or {}
+    debt_fields = debt_fields or {}
+    user_ids = [user.pk for user in users]
+    existing = set(Account.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True))
+
+    accounts = [
+        Account(user_id=user_id, **account_fields.get(user_id, {}))
+        for user_id in user_ids
+        if user_id not in existing
+    ]
+    numbers.assign_many(accounts)
+    Account.objects.bulk_create(accounts, batch_size=batch_size)
+
+    account_ids = [account.pk for account in accounts]
+    with_debt = set(Debt.objects.filter(account_id__in=account_ids).values_list("account_id", flat=True))
+    debts = [
+        Debt(account_id=account.pk, **debt_fields.get(account.user_id, {}))
+        for account in accounts
+        if account.pk not in with_debt
+    ]
+    for debt in debts:
+        debt.apply_status()
+        debt.start_terms()
+    Debt.objects.bulk_create(debts, batch_size=batch_size)
+
+    if sync:
+        directory.sync(account_ids)
+    return accounts
+
+
+def bulk_create_users(users, batch_size=1000):
+    """bulk_create users together with their accounts, without per-row signals"""
+    users = User.objects.bulk_create(users, batch_size=batch_size)
+    provision_accounts(users, batch_size=batch_size)
+    return users
@@ -0,0 +1,18 @@
+from django import template
+
+from core_apps.account import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail(source, css_pixels):
+    """
+    URL of a KYC or AccountDirectory image sized for css_pixels.
+
+    Usage: <img src="{% thumbnail kyc 40 %}" style="width: 40px; ...">
+    """
+    if not source:
+        return ""
+    image = source.image
+    return thumbnails.url(getattr(image, "name", image), source.image_hash, int(css_pixels))
@@ -1,3 +1,39 @@
-# from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import TestCase
+from django.utils import timezone
+
+from core_apps.account import accrual
+from core_apps.account.models import Debt, DebtAccrual
+from core_apps.userauths.models import User
+
+
+def make_debt(username):
+    """The zero Debt the signals create for a new customer"""
+    user = User.objects.create_user(username=username, email=f"{username}@example.com", password="secret")
+    return Debt.objects.get(account__user=user)
+
+
+class AccrualTests(TestCase):
+    def test_debt_funded_long_after_signup_is_not_back_billed(self):
+        debt = make_debt("late")
+        Debt.objects.filter(pk=debt.pk).update(created_at=timezone.now() - timedelta(days=365))
+        self.assertIsNone(debt.last_accrued_on)
+
+        debt.total_amount = debt.remaining_amount = Decimal("1000.00")
+        debt.interest_rate = Decimal("12.00")
+        debt.save()
+        today = timezone.localdate()
+        self.assertEqual(debt.last_accrued_on, today)
+
+        self.assertEqual(accrual.accrue(as_of=today), (0, Decimal("0.00")))
+        self.assertEqual(accrual.accrue(as_of=today + timedelta(days=1)), (1, Decimal("0.33")))
+        debt.refresh_from_db()
+        self.assertEqual(debt.remaining_amount, Decimal("1000.33"))
+        self.assertEqual(DebtAccrual.objects.get(debt=debt).period_start, today)
+
+    def test_zero_debt_does_not_accrue(self):
+        debt = make_debt("empty")
+        self.assertIsNone(debt.last_accrued_on)
+        self.assertEqual(accrual.accrue(), (0, Decimal("0.00")))
@@ -0,0 +1,125 @@
+"""
+Square WebP thumbnails of KYC profile images.
+
+Derivatives are named by the SHA-256 of the original's bytes, so identical
+uploads share one set of files and a replaced photo can never be served a
+stale thumbnail. They are generated when an image is uploaded; images that
+predate this module are served as-is until generate_thumbnails backfills them.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+THUMBNAIL_DIR = "thumbs"
+
+# What Pillow raises on a file it cannot or will not decode
+IMAGE_ERRORS = (OSError, ValueError, Image.DecompressionBombError)
+
+# Every KYC row starts out with this image, so its hash is known up front
+DEFAULT_IMAGE = "default.jpg"
+DEFAULT_IMAGE_HASH = "f58d20bf97ba64437a02d535f3e0bc3014cb6e045ecb60e897b3cc20bcf8c821"
+
+# Stored in place of a hash for images Pillow could not read, so they are not retried on every pass
+FAILED = "unreadable"
+
+# Enough for the 40-100px avatars at 2x pixel density
+DEFAULT_SIZES = (80, 120, 200)
+
+
+def sizes():
+    return tuple(sorted(getattr(settings, "KYC_THUMBNAIL_SIZES", DEFAULT_SIZES)))
+
+
+def quality():
+    return getattr(settings, "KYC_THUMBNAIL_QUALITY", 80)
+
+
+def derivative_name(digest, size):
+    return f"{THUMBNAIL_DIR}/{digest[:2]}/{digest}-{size}.webp"
+
+
+def pick_size(css_pixels, density=2):
+    """Smallest generated size covering css_pixels at the given pixel density"""
+    wanted = css_pixels * density
+    for size in sizes():
+        if size >= wanted:
+            return size
+    return sizes()[-1]
+
+
+def content_hash(f):
+    digest = hashlib.sha256()
+    f.seek(0)
+    for chunk in iter(lambda: f.read(64 * 1024), b""):
+        digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def render(image, size):
+    thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+    out = BytesIO()
+    thumbnail.save(out, "WEBP", quality=quality(), method=4)
+    return out.getvalue()
+
+
+def generate(f, digest):
+    """Write any missing derivatives of the image in f"""
+    missing = [size for size in sizes() if not default_storage.exists(derivative_name(digest, size))]
+    if not missing:
+        return
+    f.seek(0)
+    with Image.open(f) as image:
+        # Lets JPEG decode at a fraction of full resolution, much faster for phone photos
+        image.draft("RGB", (missing[-1] * 2, missing[-1] * 2))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for size in missing:
+            default_storage.save(derivative_name(digest, size), ContentFile(render(image, size)))
+    f.seek(0)
+
+
+def process(f):
+    """Hash an image file and make sure its derivatives exist; returns the hash"""
+    digest = content_hash(f)
+    generate(f, digest)
+    return digest
+
+
+def process_stored(name):
+    """
+    process() for a file already in media storage, recording the hash on
+    every row that uses it and has none yet. Rows whose image cannot be
+    read are marked FAILED before the error is re-raised.
+    """
+    from core_apps.account.models import KYC, AccountDirectory
+
+    try:
+        with default_storage.open(name, "rb") as f:
+            digest = process(f)
+    except IMAGE_ERRORS:
+        KYC.objects.filter(image=name, image_hash="").update(image_hash=FAILED)
+        AccountDirectory.objects.filter(image=name, image_hash="").update(image_hash=FAILED)
+        raise
+    KYC.objects.filter(image=name, image_hash__in=["", FAILED]).update(image_hash=digest)
+    AccountDirectory.objects.filter(image=name, image_hash__in=["", FAILED]).update(image_hash=digest)
+    return digest
+
+
+def url(name, digest, css_pixels):
+    """
+    URL of the thumbnail for an image rendered at css_pixels.
+
+    Images without a usable digest, either not backfilled yet or unreadable,
+    are served as the original; nothing is generated while rendering.
+    """
+    if not name:
+        return ""
+    if not digest and name == DEFAULT_IMAGE:
+        digest = DEFAULT_IMAGE_HASH
+    if not digest or digest == FAILED:
+        return default_storage.url(name)
+    return default_storage.url(derivative_name(digest, pick_size(css_pixels)))
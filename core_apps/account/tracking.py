@@ -0,0 +1,53 @@
+class DirtyFieldsMixin:
+    """
+    Remember each field's value as loaded so callers can tell what a save would change.
+
+    Put it before models.Model in the bases. The snapshot is retaken after
+    every save, so post_save receivers still see the fields that save wrote.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._reset_tracking()
+
+    def _tracked_values(self):
+        deferred = self.get_deferred_fields()
+        return {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+    def _reset_tracking(self):
+        self._loaded_values = self._tracked_values()
+
+    def get_dirty_fields(self):
+        """Names of fields that differ from the database; every field for an unsaved row"""
+        if self._state.adding:
+            return [field.name for field in self._meta.concrete_fields]
+        loaded = self._loaded_values
+        return [
+            self._meta.get_field(attname).name
+            for attname, value in self._tracked_values().items()
+            if attname not in loaded or loaded[attname] != value
+        ]
+
+    def is_dirty(self):
+        return bool(self.get_dirty_fields())
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self._reset_tracking()
+            return
+        # Fields left out of update_fields are still unsaved
+        current = self._tracked_values()
+        for name in update_fields:
+            attname = self._meta.get_field(name).attname
+            if attname in current:
+                self._loaded_values[attname] = current[attname]
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._reset_tracking()
@@ -9,5 +9,7 @@ urlpatterns = [
     path("dashboard/", views.dashboard, name="dashboard"),
     path("", views.account, name="account"),
     path("kyc-reg/", views.kyc_registration, name="kyc-reg"),
+    path("autocomplete/", views.autocomplete, name="autocomplete"),
+    path("debt/schedule/", views.debt_schedule, name="debt-schedule"),
     path("payment-request-dashboard/", payment_request.payment_request_dashboard, name="payment-request-dashboard"),
 ]
\ No newline at end of file
@@ -1,45 +1,21 @@
 from django.shortcuts import render, redirect
-from core_apps.account.models import KYC, Account, Debt, DebtPayment
+from core_apps.account import amortization, directory
+from core_apps.account.context import kyc_required
+from core_apps.account.models import DebtPayment
 from core_apps.account.forms import KYCForm
 from django.contrib import messages
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
+from core_apps.core import jobs, uploads
 from core_apps.core.forms import CreditCardForm
 from core_apps.core.models import CreditCard
+from core_apps.core.rollups import month_summary
 from django.core.exceptions import ObjectDoesNotExist
 
-def get_user_kyc(user):
-    """Helper function to get KYC or return None"""
-    try:
-        return KYC.objects.get(user=user)
-    except KYC.DoesNotExist:
-        return None
-
-def get_user_account(user):
-    """Helper function to get user account"""
-    try:
-        return Account.objects.get(user=user)
-    except Account.DoesNotExist:
-        return None
-
-def kyc_required(view_func):
-    """Decorator to check if user has completed KYC"""
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            messages.warning(request, "You need to login to access this page.")
-            return redirect("core_apps.userauths:sign-in")
-        
-        kyc = get_user_kyc(request.user)
-        if not kyc:
-            messages.warning(request, "You need to complete your KYC registration to access this page.")
-            return redirect("core_apps.account:kyc-reg")
-        
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
 @login_required
 def account(request):
-    kyc = get_user_kyc(request.user)
-    account = get_user_account(request.user)
+    kyc = request.user_context.kyc
+    account = request.user_context.account
     
     if not kyc:
         messages.warning(request, "You need to submit your KYC.")
@@ -52,26 +28,28 @@ def account(request):
     context = {
         "kyc": kyc,
         "account": account,
+        "upload_job": jobs.latest_for([kyc]).get(jobs.target_key(kyc)),
     }
     return render(request, "account/account.html", context)
 
 @login_required
 def kyc_registration(request):
-    account = get_user_account(request.user)
+    account = request.user_context.account
     
     if not account:
         messages.error(request, "Account not found. Please contact support.")
         return redirect("core_apps.userauths:sign-in")
     
-    kyc = get_user_kyc(request.user)
+    kyc = request.user_context.kyc
     
     if request.method == "POST":
-        form = KYCForm(request.POST, request.FILES, instance=kyc)
+        form = KYCForm(request.POST, request.FILES, instance=kyc, uploader=request.user)
         if form.is_valid():
             new_form = form.save(commit=False)
             new_form.user = request.user
             new_form.account = account
             new_form.save()
+            uploads.enqueue(form, new_form, request.user)
             messages.success(request, "KYC Form submitted successfully, In review now.")
             return redirect("core_apps.account:account")
     else:
@@ -81,13 +59,14 @@ def kyc_registration(request):
         "account": account,
         "form": form,
         "kyc": kyc,
+        "upload_job": jobs.latest_for([kyc]).get(jobs.target_key(kyc)) if kyc else None,
     }
     return render(request, "account/kyc-form.html", context)
 
 @kyc_required
 def dashboard(request):
-    account = get_user_account(request.user)
-    kyc = get_user_kyc(request.user)
+    account = request.user_context.account
+    kyc = request.user_context.kyc
     
     if not account:
         messages.error(request, "Account not found. Please contact support.")
@@ -96,12 +75,9 @@ def dashboard(request):
     credit_card = CreditCard.objects.filter(user=request.user).order_by("-id")
     
     # Get debt information
-    try:
-        debt = Debt.objects.get(account=account)
-        debt_payments = DebtPayment.objects.filter(debt=debt).order_by("-created_at")[:5]
-    except Debt.DoesNotExist:
-        debt = None
-        debt_payments = None
+    debt = request.user_context.debt
+    debt_payments = DebtPayment.objects.filter(debt=debt).order_by("-created_at")[:5] if debt else None
+    amortization_schedule = amortization.for_debt(debt)
 
     if request.method == "POST":
         form = CreditCardForm(request.POST)
@@ -121,5 +97,26 @@ def dashboard(request):
         "credit_card": credit_card,
         "debt": debt,
         "debt_payments": debt_payments,
+        "amortization": amortization_schedule,
+        "this_month": month_summary(account),
     }
-    return render(request, "account/dashboard.html", context)
\ No newline at end of file
+    return render(request, "account/dashboard.html", context)
+
+@login_required
+@kyc_required
+def autocomplete(request):
+    """Account suggestions for the search boxes as JSON"""
+    results, _ = directory.search(
+        request.GET.get("q", ""),
+        exclude_user=request.user,
+        size=directory.autocomplete_size(),
+        ordered=False,
+    )
+    return JsonResponse({"results": [directory.as_json(entry) for entry in results]})
+
+@login_required
+@kyc_required
+def debt_schedule(request):
+    """Projected repayment schedule of the signed-in user's debt as JSON"""
+    schedule = amortization.for_debt(request.user_context.debt)
+    return JsonResponse({"schedule": amortization.as_json(schedule) if schedule else None})
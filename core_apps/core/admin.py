@@ -1,5 +1,5 @@
 from django.contrib import admin
-from core_apps.core.models import GrantApplication, LoanApplication, PaymentRequest, SubscriptionPlan, Transaction, CreditCard, UserSubscription
+from core_apps.core.models import BalanceSnapshot, BillingRun, DailyAccountRollup, GrantApplication, Job, StoredBlob, LedgerEntry, LoanApplication, PaymentRequest, SubscriptionPlan, Transaction, CreditCard, UserSubscription
 
 class TransactionAdmin(admin.ModelAdmin):
     list_editable = ['amount', 'status', 'transaction_type', 'receiver', 'sender']
@@ -46,6 +46,49 @@ class PaymentRequestAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
 
 
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ['journal_id', 'entry_type', 'ledger_account', 'direction', 'amount', 'created_at']
+    list_filter = ['entry_type', 'direction']
+    search_fields = ['journal_id', 'ledger_account', 'transaction__transaction_id']
+    readonly_fields = [f.name for f in LedgerEntry._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(BalanceSnapshot)
+class BalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['account', 'balance', 'last_entry_id', 'taken_at']
+    readonly_fields = ['account', 'balance', 'last_entry_id', 'taken_at']
+
+@admin.register(DailyAccountRollup)
+class DailyAccountRollupAdmin(admin.ModelAdmin):
+    list_display = ['account', 'day', 'direction', 'transaction_type', 'count', 'total']
+    list_filter = ['direction', 'transaction_type', 'day']
+    readonly_fields = ['account', 'day', 'direction', 'transaction_type', 'count', 'total']
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'handler', 'status', 'attempts', 'user', 'target_type', 'target_id', 'created_at', 'finished_at']
+    list_filter = ['status', 'handler']
+    search_fields = ['target_id', 'user__email']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'worker']
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'size', 'refcount', 'created_at', 'last_used_at']
+    search_fields = ['sha256', 'name']
+    readonly_fields = ['sha256', 'name', 'size', 'source_sha256', 'refcount', 'created_at', 'last_used_at']
+
+@admin.register(BillingRun)
+class BillingRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'as_of', 'processor', 'status', 'renewed', 'failed', 'expired', 'charged', 'started_at', 'finished_at']
+    list_filter = ['status', 'processor']
+    readonly_fields = ['cursor_period_end', 'cursor_id', 'renewed', 'failed', 'expired', 'charged', 'started_at', 'finished_at']
+
     
 admin.site.register(Transaction, TransactionAdmin)
 admin.site.register(CreditCard, CreditCardAdmin)
\ No newline at end of file
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core_apps.core'
+
+    def ready(self):
+        from core_apps.account.models import DebtPayment
+        from core_apps.core import blobstore, entitlements, ledger
+
+        post_save.connect(ledger.post_debt_payment, sender=DebtPayment, dispatch_uid="ledger_debt_payment")
+        blobstore.connect(self.apps.get_models())
+        entitlements.connect()
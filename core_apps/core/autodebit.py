@@ -0,0 +1,150 @@
+"""
+Automatic debt repayment from account balances.
+
+run() walks debts with a due date whose account holds money, in primary
+key order, one chunk per transaction. Each chunk locks its accounts with
+lock_balances() and then its debts, so it queues behind Account.save() in
+the same order. It takes each installment from the balance with
+apply_deltas(), records the payments with one bulk_create and reduces
+remaining_amount with one F() UPDATE.
+
+An installment is the level monthly payment that clears the debt by its
+due date, as worked out in core_apps.account.amortization. It is taken at
+most once per calendar month. Once the due date has passed, each month takes
+no more than the installment scheduled over the term from funded_on to the
+due date, never the whole balance.
+
+Every payment is also written as a completed debt_payment Transaction and
+counted in the daily rollups, so it shows on the customer's statement and
+in the dashboard's money out.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.utils import timezone
+
+from core_apps.account.amortization import installments_left, monthly_payment
+from core_apps.account.models import Account, Debt, DebtPayment
+from core_apps.core import balance, ledger, rollups
+from core_apps.core.models import Transaction
+
+ZERO = Decimal("0.00")
+
+
+def chunk_size():
+    return getattr(settings, "AUTODEBIT_CHUNK_SIZE", 500)
+
+
+def due_debts(today):
+    month_start = today.replace(day=1)
+    return Debt.objects.filter(
+        status__in=("active", "overdue"),
+        remaining_amount__gt=0,
+        due_date__isnull=False,
+        funded_on__isnull=False,
+        account__account_balance__gt=0,
+    ).filter(
+        Q(last_debited_on__isnull=True) | Q(last_debited_on__lt=month_start)
+    ).order_by("pk")
+
+
+def installment(remaining, total, rate, opened_on, due_date, today):
+    """What to take this month; past the due date, the installment scheduled over the debt's full term"""
+    if due_date > today:
+        return monthly_payment(remaining, rate, installments_left(today, due_date))
+    return min(remaining, monthly_payment(total, rate, installments_left(opened_on, due_date)))
+
+
+def debit_chunk(today, after_pk, size):
+    """Collect installments on the next chunk of debts; returns (last pk or None when done, payments, amount)"""
+    candidates = list(due_debts(today).filter(pk__gt=after_pk).values_list("pk", "account_id")[:size])
+    if not candidates:
+        return None, 0, ZERO
+
+    with transaction.atomic():
+        balances = balance.lock_balances(account_id for _, account_id in candidates)
+        # Re-read under the lock; a payment or an admin edit may have landed since
+        debts = (
+            due_debts(today)
+            .filter(pk__in=[pk for pk, _ in candidates])
+            .select_for_update(of=("self",))
+            .values_list(
+                "pk", "account_id", "account__user_id", "remaining_amount", "total_amount", "interest_rate",
+                "funded_on", "due_date",
+            )
+        )
+
+        payments = []
+        owners = {}
+        for pk, account_id, user_id, remaining, total, rate, funded_on, due_date in debts:
+            due = installment(remaining, total, rate, funded_on, due_date, today)
+            amount = min(due, balances.get(account_id, ZERO))
+            if amount > 0:
+                payments.append((pk, account_id, amount))
+                owners[account_id] = user_id
+
+        if payments:
+            balance.apply_deltas({account_id: -amount for _, account_id, amount in payments})
+            DebtPayment.objects.bulk_create([
+                DebtPayment(debt_id=pk, amount=amount, payment_type="installment", status="completed")
+                for pk, _, amount in payments
+            ])
+            paid = Case(
+                *[When(pk=pk, then=Value(amount)) for pk, _, amount in payments],
+                default=Value(ZERO),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )
+            now = timezone.now()
+            debt_ids = [pk for pk, _, _ in payments]
+            Debt.objects.filter(pk__in=debt_ids).update(
+                remaining_amount=F("remaining_amount") - paid,
+                last_debited_on=today,
+                updated_at=now,
+            )
+            # Debt.apply_status for the debts this chunk cleared
+            Debt.objects.filter(pk__in=debt_ids, remaining_amount__lte=0).update(status="paid", updated_at=now)
+            # The customer-facing record of each debit, for the statement and history
+            transactions = Transaction.objects.bulk_create([
+                Transaction(
+                    user_id=owners[account_id],
+                    sender_id=owners[account_id],
+                    sender_account_id=account_id,
+                    amount=amount,
+                    description="Debt installment",
+                    status="completed",
+                    transaction_type="debt_payment",
+                    updated=now,
+                )
+                for _, account_id, amount in payments
+            ])
+            ledger.post_many(
+                ("debt_payment", [
+                    ledger.account_leg(Account(pk=account_id), "debit", amount),
+                    ledger.external_leg(f"debt:{pk}", "credit", amount),
+                ], txn)
+                for (pk, account_id, amount), txn in zip(payments, transactions)
+            )
+            rollups.add(
+                (account_id, today, "out", "debt_payment", amount)
+                for _, account_id, amount in payments
+            )
+
+    return candidates[-1][0], len(payments), sum((amount for _, _, amount in payments), ZERO)
+
+
+def run(today=None, size=None, progress=None):
+    """Take every installment due by today (default today); returns (payments made, total collected)"""
+    today = today or timezone.localdate()
+    size = size or chunk_size()
+    after_pk = 0
+    made, collected = 0, ZERO
+    while True:
+        after_pk, count, amount = debit_chunk(today, after_pk, size)
+        if after_pk is None:
+            return made, collected
+        made += count
+        collected += amount
+        if progress is not None:
+            progress(made, collected)
@@ -0,0 +1,146 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from core_apps.account.models import Account
+from core_apps.core import ledger, rollups
+from core_apps.core.models import CreditCard, Transaction
+
+
+class InsufficientFunds(Exception):
+    """Raised when a debit would take a balance below zero"""
+
+
+class TransactionAlreadyProcessed(Exception):
+    """Raised when a transaction is no longer in the status we expected"""
+
+
+def _account_pk(account):
+    return account.pk if isinstance(account, Account) else account
+
+
+def debit_account(account, amount):
+    """Take amount from an account in a single conditional UPDATE"""
+    amount = Decimal(amount)
+    updated = Account.objects.filter(
+        pk=_account_pk(account),
+        account_balance__gte=amount,
+    ).update(account_balance=F("account_balance") - amount)
+
+    if not updated:
+        raise InsufficientFunds("Insufficient funds.")
+
+
+def credit_account(account, amount):
+    """Add amount to an account in a single UPDATE"""
+    amount = Decimal(amount)
+    Account.objects.filter(pk=_account_pk(account)).update(account_balance=F("account_balance") + amount)
+
+
+def lock_balances(account_pks):
+    """
+    Lock a set of accounts in primary key order and return their balances.
+
+    Everything that touches more than two accounts goes through here first,
+    so concurrent batches always queue on rows in the same order.
+    """
+    rows = (
+        Account.objects.select_for_update()
+        .filter(pk__in=set(account_pks))
+        .order_by("pk")
+        .values_list("pk", "account_balance")
+    )
+    return dict(rows)
+
+
+def apply_deltas(deltas):
+    """
+    Apply signed balance changes to many accounts in a single UPDATE.
+
+    Callers hold the locks from lock_balances() and have already checked
+    that no balance goes negative.
+    """
+    deltas = {pk: Decimal(delta) for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+
+    change = Case(
+        *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+        default=Value(Decimal("0.00")),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    return Account.objects.filter(pk__in=list(deltas)).update(account_balance=F("account_balance") + change)
+
+
+def transfer_funds(sender_account, receiver_account, amount):
+    """
+    Move amount between two accounts atomically.
+
+    Rows are always touched in primary key order so two opposite transfers
+    running at the same time lock them in the same order and cannot deadlock.
+    """
+    amount = Decimal(amount)
+    if amount <= 0:
+        raise ValueError("Amount must be greater than zero.")
+
+    legs = sorted(
+        [(_account_pk(sender_account), debit_account), (_account_pk(receiver_account), credit_account)],
+        key=lambda leg: leg[0],
+    )
+
+    with transaction.atomic():
+        for account_pk, apply in legs:
+            apply(account_pk, amount)
+
+
+def settle_transaction(txn, sender_account, receiver_account, from_status, to_status):
+    """
+    Move txn.amount from sender to receiver and flip the transaction status.
+
+    The status flip is a conditional UPDATE, so a double submit can only ever
+    move the money once. Nothing is written if either step fails.
+    """
+    with transaction.atomic():
+        claimed = Transaction.objects.filter(pk=txn.pk, status=from_status).update(
+            status=to_status,
+            updated=timezone.now(),
+        )
+        if not claimed:
+            raise TransactionAlreadyProcessed("This transaction has already been processed.")
+
+        transfer_funds(sender_account, receiver_account, txn.amount)
+        ledger.post_transfer(txn, sender_account, receiver_account, txn.amount)
+        rollups.record_transfer(txn, sender_account, receiver_account, txn.amount)
+
+    txn.status = to_status
+    return txn
+
+
+def fund_card(account, credit_card, amount):
+    """Move amount from an account onto one of its credit cards"""
+    amount = Decimal(amount)
+    if amount <= 0:
+        raise ValueError("Amount must be greater than zero.")
+
+    # Accounts are always locked before cards
+    with transaction.atomic():
+        debit_account(account, amount)
+        CreditCard.objects.filter(pk=credit_card.pk).update(amount=F("amount") + amount)
+        ledger.post_card_funding(account, credit_card, amount)
+
+
+def withdraw_from_card(account, credit_card, amount):
+    """Move amount from a credit card back to its owner's account"""
+    amount = Decimal(amount)
+    if amount <= 0:
+        raise ValueError("Amount must be greater than zero.")
+
+    with transaction.atomic():
+        credit_account(account, amount)
+        updated = CreditCard.objects.filter(pk=credit_card.pk, amount__gte=amount).update(
+            amount=F("amount") - amount
+        )
+        if not updated:
+            raise InsufficientFunds("Insufficient funds on card.")
+        ledger.post_card_withdrawal(account, credit_card, amount)
@@ -0,0 +1,225 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.utils import timezone
+
+from core_apps.account.context import kyc_required
+from core_apps.account.models import Account
+from core_apps.core import balance, ids, ledger, rollups
+from core_apps.core.models import Transaction
+
+RESULT_FIELDS = ["row", "account_number", "amount", "status", "transaction_id", "detail"]
+
+
+def max_batch_rows():
+    return getattr(settings, "BATCH_TRANSFER_MAX_ROWS", 1000)
+
+
+def parse_rows(data, fmt="csv"):
+    """Read (account_number, amount, description) rows from CSV or JSON text"""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+
+    if fmt == "json":
+        try:
+            rows = json.loads(data)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("JSON batch must be a list of objects.")
+    else:
+        reader = csv.DictReader(io.StringIO(data))
+        if not reader.fieldnames or "account_number" not in reader.fieldnames or "amount" not in reader.fieldnames:
+            raise ValueError("CSV batch needs an account_number and an amount column.")
+        rows = list(reader)
+
+    if not rows:
+        raise ValueError("The batch is empty.")
+    if len(rows) > max_batch_rows():
+        raise ValueError(f"A batch can have at most {max_batch_rows()} rows.")
+
+    return [
+        {
+            "account_number": str(row.get("account_number") or "").strip(),
+            "amount": str(row.get("amount") or "").strip(),
+            "description": str(row.get("description") or "").strip(),
+        }
+        for row in rows
+    ]
+
+
+def run_batch(user, sender_account, rows):
+    """
+    Pay every valid row from sender_account in a single DB transaction.
+
+    Receivers are resolved in one query. Rows that fail validation are
+    reported and skipped; the remaining rows either all complete or, if the
+    sender cannot cover their total, all fail.
+    """
+    numbers = {row["account_number"] for row in rows if row["account_number"]}
+    receivers = {
+        account.account_number: account
+        for account in Account.objects.filter(account_number__in=numbers).only("pk", "account_number", "user_id")
+    }
+
+    results = []
+    payable = []
+    for index, row in enumerate(rows, start=1):
+        result = {
+            "row": index,
+            "account_number": row["account_number"],
+            "amount": row["amount"],
+            "status": "rejected",
+            "transaction_id": "",
+            "detail": "",
+        }
+        results.append(result)
+
+        try:
+            amount = Decimal(row["amount"])
+            # NaN and Infinity parse, but cannot be compared or stored
+            if not amount.is_finite():
+                raise InvalidOperation
+            amount = amount.quantize(Decimal("0.01"))
+        except (InvalidOperation, ValueError):
+            result["detail"] = "Invalid amount format."
+            continue
+        if amount <= 0:
+            result["detail"] = "Amount must be greater than zero."
+            continue
+
+        receiver = receivers.get(row["account_number"])
+        if receiver is None:
+            result["detail"] = "Account does not exist."
+            continue
+        if receiver.pk == sender_account.pk:
+            result["detail"] = "You cannot transfer money to your own account."
+            continue
+
+        result["amount"] = str(amount)
+        payable.append((result, receiver, amount, row["description"]))
+
+    if not payable:
+        return results
+
+    total = sum((amount for _, _, amount, _ in payable), Decimal("0.00"))
+    with transaction.atomic():
+        balances = balance.lock_balances([sender_account.pk] + [receiver.pk for _, receiver, _, _ in payable])
+        if balances.get(sender_account.pk, Decimal("0.00")) < total:
+            for result, _, _, _ in payable:
+                result["status"] = "failed"
+                result["detail"] = "Insufficient funds."
+            return results
+
+        deltas = defaultdict(Decimal)
+        deltas[sender_account.pk] -= total
+        for _, receiver, amount, _ in payable:
+            deltas[receiver.pk] += amount
+        balance.apply_deltas(deltas)
+
+        now = timezone.now()
+        transactions = Transaction.objects.bulk_create([
+            Transaction(
+                transaction_id=transaction_id,
+                user=user,
+                amount=amount,
+                description=description,
+                sender=user,
+                receiver_id=receiver.user_id,
+                sender_account=sender_account,
+                receiver_account=receiver,
+                status="completed",
+                transaction_type="transfer",
+                updated=now,
+            )
+            for transaction_id, (_, receiver, amount, description) in zip(ids.transaction_ids(len(payable)), payable)
+        ])
+        ledger.post_many(
+            ledger.transfer_journal(txn, sender_account, receiver, amount)
+            for txn, (_, receiver, amount, _) in zip(transactions, payable)
+        )
+        rollups.add(
+            movement
+            for _, receiver, amount, _ in payable
+            for movement in rollups.transfer_movements("transfer", sender_account.pk, receiver.pk, amount, timezone.localdate(now))
+        )
+
+    for txn, (result, _, _, _) in zip(transactions, payable):
+        result["status"] = "completed"
+        result["transaction_id"] = txn.transaction_id
+
+    return results
+
+
+class Echo:
+    """File-like object that hands back whatever csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def stream_results(results):
+    writer = csv.DictWriter(Echo(), fieldnames=RESULT_FIELDS)
+    yield writer.writeheader()
+    for result in results:
+        yield writer.writerow(result)
+
+
+@login_required
+@kyc_required
+def batch_transfer(request):
+    """Pay many recipients from one account with a single PIN check"""
+    kyc = request.user_context.kyc
+    sender_account = request.user.account
+
+    if request.method == "POST":
+        pin_number = request.POST.get("pin-number", "").strip()
+        if not pin_number:
+            messages.warning(request, "Please enter your PIN.")
+            return redirect("core_apps.core:batch-transfer")
+        if pin_number != sender_account.pin_number:
+            messages.warning(request, "Incorrect PIN.")
+            return redirect("core_apps.core:batch-transfer")
+
+        upload = request.FILES.get("batch_file")
+        if getattr(upload, "upload_error", None):
+            messages.warning(request, upload.upload_error)
+            return redirect("core_apps.core:batch-transfer")
+        if upload:
+            data = upload.read()
+            fmt = "json" if upload.name.lower().endswith(".json") else "csv"
+        else:
+            data = request.POST.get("batch_rows", "")
+            fmt = request.POST.get("batch_format", "csv")
+
+        try:
+            rows = parse_rows(data, fmt)
+        except (ValueError, UnicodeDecodeError) as e:
+            messages.warning(request, str(e))
+            return redirect("core_apps.core:batch-transfer")
+
+        try:
+            results = run_batch(request.user, sender_account, rows)
+        except Exception as e:
+            messages.error(request, "An error occurred while processing the batch.")
+            print(f"Batch transfer error: {e}")
+            return redirect("core_apps.core:batch-transfer")
+
+        response = StreamingHttpResponse(stream_results(results), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="batch-transfer-results.csv"'
+        return response
+
+    context = {
+        "account": sender_account,
+        "kyc": kyc,
+        "max_rows": max_batch_rows(),
+    }
+    return render(request, "transfer/batch-transfer.html", context)
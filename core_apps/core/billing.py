@@ -0,0 +1,233 @@
+"""
+Subscription renewal and expiry in bulk.
+
+run_cycle() walks active subscriptions whose period ended by as_of in
+(current_period_end, id) order, one chunk per transaction. Each chunk is
+charged through a processor in one call, then the period fields are written
+with a single bulk_update and the BillingRun cursor moves past the chunk in
+the same transaction. A run that stops part way resumes from its cursor, and
+renewed rows leave the due set, so nothing is charged twice.
+
+A processor is any class with a charge(charges) method returning
+{subscription pk: (ok, detail)}. BalanceProcessor takes the fee from the
+customer's SaroPay balance and records each renewal as a completed
+subscription Transaction, counted in the daily rollups like any other money
+out. StubProcessor stands in for a card gateway such
+as Stripe and approves everything; a real gateway adapter should send each
+charge's idempotency_key so a retried chunk is not billed twice.
+"""
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core_apps.account.models import Account
+from core_apps.core import balance, entitlements, ledger, rollups
+from core_apps.core.models import BillingRun, Transaction, UserSubscription
+
+ZERO = Decimal("0.00")
+REVENUE_ACCOUNT = "revenue:subscriptions"
+
+CYCLES = {
+    "monthly": relativedelta(months=1),
+    "quarterly": relativedelta(months=3),
+    "yearly": relativedelta(years=1),
+    "annual": relativedelta(years=1),
+}
+
+PROCESSORS = {
+    "balance": "core_apps.core.billing.BalanceProcessor",
+    "stub": "core_apps.core.billing.StubProcessor",
+}
+
+
+def chunk_size():
+    return getattr(settings, "BILLING_CHUNK_SIZE", 1000)
+
+
+def default_processor():
+    return getattr(settings, "BILLING_PROCESSOR", "balance")
+
+
+def get_processor(name):
+    """Processor instance for a PROCESSORS name or a dotted class path"""
+    return import_string(PROCESSORS.get(name, name))()
+
+
+def cycle_length(billing_cycle):
+    return CYCLES.get((billing_cycle or "").lower(), CYCLES["monthly"])
+
+
+def next_period(period_end, billing_cycle, as_of):
+    """
+    (start, end) of the period following one that ended at period_end.
+
+    A subscription more than a whole cycle behind is not billed for the
+    periods it missed; its new period starts at as_of.
+    """
+    length = cycle_length(billing_cycle)
+    start = period_end if period_end + length > as_of else as_of
+    return start, start + length
+
+
+class BalanceProcessor:
+    """Takes renewals from the customer's account balance, inside the chunk's transaction"""
+
+    def charge(self, charges):
+        balances = balance.lock_balances(charge["account_id"] for charge in charges)
+        outcomes = {}
+        deltas = defaultdict(Decimal)
+        paid = []
+        for charge in charges:
+            account_id, amount = charge["account_id"], charge["amount"]
+            available = balances.get(account_id, ZERO) + deltas[account_id]
+            if account_id is None or available < amount:
+                outcomes[charge["pk"]] = (False, "Insufficient funds.")
+                continue
+            deltas[account_id] -= amount
+            paid.append(charge)
+            outcomes[charge["pk"]] = (True, "")
+
+        balance.apply_deltas(deltas)
+        now = timezone.now()
+        # The customer-facing record of each renewal, for the statement and history
+        transactions = Transaction.objects.bulk_create([
+            Transaction(
+                user_id=charge["user_id"],
+                sender_id=charge["user_id"],
+                sender_account_id=charge["account_id"],
+                amount=charge["amount"],
+                description="Subscription renewal",
+                status="completed",
+                transaction_type="subscription",
+                updated=now,
+            )
+            for charge in paid
+        ])
+        ledger.post_many(
+            ("subscription", [
+                ledger.account_leg(Account(pk=charge["account_id"]), "debit", charge["amount"]),
+                ledger.external_leg(REVENUE_ACCOUNT, "credit", charge["amount"]),
+            ], txn)
+            for charge, txn in zip(paid, transactions)
+        )
+        today = timezone.localdate(now)
+        rollups.add((charge["account_id"], today, "out", "subscription", charge["amount"]) for charge in paid)
+        return outcomes
+
+
+class StubProcessor:
+    """Local stand-in for a card gateway: approves every charge with a fake charge id"""
+
+    def charge(self, charges):
+        return {charge["pk"]: (True, f"ch_stub_{uuid.uuid4().hex[:24]}") for charge in charges}
+
+
+def due_subscriptions(run):
+    due = UserSubscription.objects.filter(is_active=True, current_period_end__lte=run.as_of)
+    if run.cursor_period_end is not None:
+        due = due.filter(
+            Q(current_period_end__gt=run.cursor_period_end)
+            | Q(current_period_end=run.cursor_period_end, pk__gt=run.cursor_id)
+        )
+    return due.order_by("current_period_end", "pk")
+
+
+def bill_chunk(run, processor, size):
+    """Renew, charge or expire the next chunk of due subscriptions; returns how many were processed"""
+    with transaction.atomic():
+        # Skipped rows are being billed by a concurrent run
+        subscriptions = list(
+            due_subscriptions(run)
+            .select_related("plan")
+            .select_for_update(of=("self",), skip_locked=True)
+            .annotate(account_id=F("user__account__pk"))[:size]
+        )
+        if not subscriptions:
+            return 0
+
+        # Cursor is taken before the period fields move
+        last_end, last_pk = subscriptions[-1].current_period_end, subscriptions[-1].pk
+        now = timezone.now()
+        charges = []
+        renewing = set()
+        for subscription in subscriptions:
+            if subscription.canceled_at is not None or subscription.plan is None:
+                continue
+            renewing.add(subscription.pk)
+            if subscription.plan.price > 0:
+                charges.append({
+                    "pk": subscription.pk,
+                    "user_id": subscription.user_id,
+                    "account_id": subscription.account_id,
+                    "customer_id": subscription.stripe_customer_id,
+                    "amount": subscription.plan.price,
+                    "idempotency_key": f"renewal:{subscription.pk}:{subscription.current_period_end.isoformat()}",
+                })
+        outcomes = processor.charge(charges) if charges else {}
+
+        renewed = expired = failed = 0
+        charged = ZERO
+        for subscription in subscriptions:
+            # Free plans renew without a charge
+            ok, _ = outcomes.get(subscription.pk, (subscription.pk in renewing, ""))
+            if ok:
+                subscription.current_period_start, subscription.current_period_end = next_period(
+                    subscription.current_period_end, subscription.plan.billing_cycle, run.as_of,
+                )
+                renewed += 1
+                if subscription.pk in outcomes:
+                    charged += subscription.plan.price
+            else:
+                subscription.is_active = False
+                if subscription.pk in renewing:
+                    failed += 1
+                else:
+                    expired += 1
+            subscription.updated_at = now
+
+        UserSubscription.objects.bulk_update(
+            subscriptions, ["current_period_start", "current_period_end", "is_active", "updated_at"],
+        )
+        entitlements.forget_users(subscription.user_id for subscription in subscriptions)
+        BillingRun.objects.filter(pk=run.pk).update(
+            cursor_period_end=last_end,
+            cursor_id=last_pk,
+            renewed=F("renewed") + renewed,
+            expired=F("expired") + expired,
+            failed=F("failed") + failed,
+            charged=F("charged") + charged,
+        )
+    run.refresh_from_db(fields=["cursor_period_end", "cursor_id", "renewed", "expired", "failed", "charged"])
+    return len(subscriptions)
+
+
+def unfinished_run():
+    return BillingRun.objects.exclude(status="done").order_by("-pk").first()
+
+
+def start_run(processor_name, as_of=None):
+    return BillingRun.objects.create(processor=processor_name, as_of=as_of or timezone.now())
+
+
+def run_cycle(run, size=None, progress=None):
+    """Bill every chunk left in run, calling progress(run) after each; returns the finished run"""
+    processor = get_processor(run.processor)
+    size = size or chunk_size()
+    BillingRun.objects.filter(pk=run.pk).update(status="running", error="")
+    try:
+        while bill_chunk(run, processor, size):
+            if progress is not None:
+                progress(run)
+    except Exception as e:
+        BillingRun.objects.filter(pk=run.pk).update(status="failed", error=f"{e.__class__.__name__}: {e}")
+        raise
+    BillingRun.objects.filter(pk=run.pk).update(status="done", finished_at=timezone.now())
+    run.refresh_from_db()
+    return run
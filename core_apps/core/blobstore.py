@@ -0,0 +1,244 @@
+"""
+Content-addressed file storage.
+
+ContentAddressedStorage wraps the default storage and saves every file
+under blobs/ named by the SHA-256 of its bytes, so identical uploads are
+written once. StoredBlob counts how many file fields point at each blob;
+signals keep the count current and collect_blobs deletes blobs nobody
+references. Names outside blobs/ are passed through untouched, so files
+stored before this existed keep working.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import Storage, default_storage
+from django.db.models import F, FileField
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = "blobs"
+
+
+def grace_period():
+    return timedelta(seconds=getattr(settings, "BLOB_GC_GRACE_SECONDS", 86400))
+
+
+def file_hash(f):
+    digest = hashlib.sha256()
+    size = 0
+    f.seek(0)
+    for chunk in iter(lambda: f.read(64 * 1024), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    f.seek(0)
+    return digest.hexdigest(), size
+
+
+def blob_name(digest, extension):
+    return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def digest_of(name):
+    """SHA-256 of a blob from its name, or "" for files outside the blob store"""
+    if not name or not name.startswith(BLOB_DIR + "/"):
+        return ""
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    def __init__(self, inner=None):
+        self._inner = inner
+
+    @property
+    def inner(self):
+        return self._inner or default_storage
+
+    def get_available_name(self, name, max_length=None):
+        # _save picks the real name from the content
+        return name
+
+    def _save(self, name, content):
+        from core_apps.core.models import StoredBlob
+
+        digest, size = file_hash(content)
+        blob, created = StoredBlob.objects.get_or_create(
+            sha256=digest,
+            defaults={"name": blob_name(digest, os.path.splitext(name)[1].lower()), "size": size},
+        )
+        if created or not self.inner.exists(blob.name):
+            saved = self.inner.save(blob.name, content)
+            # Another process wrote the same blob first; keep theirs
+            if saved != blob.name:
+                self.inner.delete(saved)
+        else:
+            StoredBlob.objects.filter(pk=blob.pk).update(last_used_at=timezone.now())
+        return blob.name
+
+    def _open(self, name, mode="rb"):
+        return self.inner.open(name, mode)
+
+    def delete(self, name):
+        # Blobs are shared; collect_blobs removes them once unreferenced
+        if not digest_of(name):
+            self.inner.delete(name)
+
+    def exists(self, name):
+        return self.inner.exists(name)
+
+    def listdir(self, path):
+        return self.inner.listdir(path)
+
+    def size(self, name):
+        return self.inner.size(name)
+
+    def url(self, name):
+        return self.inner.url(name)
+
+    def path(self, name):
+        return self.inner.path(name)
+
+    def get_created_time(self, name):
+        return self.inner.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.inner.get_modified_time(name)
+
+
+storage = ContentAddressedStorage()
+
+
+def get_storage():
+    """Callable for FileField(storage=...), so migrations do not capture the storage instance"""
+    return storage
+
+
+def find_source(source_digest):
+    """
+    Blob previously produced from a raw upload with this hash, if it is still stored.
+
+    The blob's last_used_at is touched before it is handed out, so collect()
+    leaves it alone for the grace period while the caller saves a reference.
+    """
+    from core_apps.core.models import StoredBlob
+
+    if not source_digest:
+        return None
+    blob = StoredBlob.objects.filter(source_sha256=source_digest).first()
+    if blob is None:
+        return None
+    # Nothing is updated if collect() deleted the blob since the SELECT
+    if not StoredBlob.objects.filter(pk=blob.pk).update(last_used_at=timezone.now()):
+        return None
+    return blob
+
+
+def remember_source(name, source_digest):
+    from core_apps.core.models import StoredBlob
+
+    StoredBlob.objects.filter(name=name, source_sha256="").update(source_sha256=source_digest)
+
+
+#REFERENCE COUNTS
+
+def blob_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def stored_name(value):
+    """Name of a committed file field value, as found in a model instance's __dict__"""
+    if isinstance(value, FieldFile):
+        return value.name if value._committed else None
+    if isinstance(value, str):
+        return value
+    return None
+
+
+def adjust(name, delta):
+    from core_apps.core.models import StoredBlob
+
+    if digest_of(name):
+        StoredBlob.objects.filter(name=name).update(refcount=F("refcount") + delta, last_used_at=timezone.now())
+
+
+def track(sender, instance, **kwargs):
+    # Raw __dict__ values: reading the attribute would load deferred fields
+    instance._blob_names = {
+        field.attname: stored_name(instance.__dict__.get(field.attname))
+        for field in blob_fields(sender)
+    }
+
+
+def count_saved(sender, instance, update_fields=None, **kwargs):
+    loaded = getattr(instance, "_blob_names", {})
+    for field in blob_fields(sender):
+        if update_fields is not None and field.name not in update_fields:
+            continue
+        old, new = loaded.get(field.attname), getattr(instance, field.attname).name
+        if old != new:
+            adjust(new, 1)
+            adjust(old, -1)
+            loaded[field.attname] = new
+
+
+def count_deleted(sender, instance, **kwargs):
+    for field in blob_fields(sender):
+        adjust(getattr(instance, field.attname).name, -1)
+
+
+def connect(models):
+    from django.db.models.signals import post_delete, post_init, post_save
+
+    for model in models:
+        if blob_fields(model):
+            post_init.connect(track, sender=model, dispatch_uid=f"blob_track_{model._meta.label_lower}")
+            post_save.connect(count_saved, sender=model, dispatch_uid=f"blob_saved_{model._meta.label_lower}")
+            post_delete.connect(count_deleted, sender=model, dispatch_uid=f"blob_deleted_{model._meta.label_lower}")
+
+
+def recount(models):
+    """Recompute every refcount from the file fields; returns how many blobs changed"""
+    from collections import Counter
+
+    from core_apps.core.models import StoredBlob
+
+    counts = Counter()
+    for model in models:
+        for field in blob_fields(model):
+            names = model._default_manager.filter(**{f"{field.attname}__startswith": BLOB_DIR + "/"})
+            counts.update(names.values_list(field.attname, flat=True).iterator())
+
+    changed = []
+    for blob in StoredBlob.objects.only("pk", "name", "refcount").iterator():
+        if blob.refcount != counts.get(blob.name, 0):
+            blob.refcount = counts.get(blob.name, 0)
+            changed.append(blob)
+    StoredBlob.objects.bulk_update(changed, ["refcount"], batch_size=1000)
+    return len(changed)
+
+
+def collect(dry_run=False):
+    """Delete blobs that have been unreferenced for longer than the grace period; returns them"""
+    from core_apps.core.models import StoredBlob
+
+    unused = StoredBlob.objects.filter(refcount__lte=0, last_used_at__lt=timezone.now() - grace_period())
+    removed = []
+    for pk, name in list(unused.values_list("pk", "name")):
+        if dry_run:
+            removed.append(name)
+            continue
+        # Re-checked in the DELETE in case the blob was referenced, or handed
+        # out by find_source() or a repeat save, since the SELECT
+        deleted, _ = StoredBlob.objects.filter(
+            pk=pk, refcount__lte=0, last_used_at__lt=timezone.now() - grace_period(),
+        ).delete()
+        if deleted:
+            storage.inner.delete(name)
+            removed.append(name)
+    return removed
@@ -2,15 +2,15 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from core_apps.core.models import CreditCard
-from core_apps.account.models import Account, KYC
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
+from core_apps.core import balance
 
 @login_required
 def card_detail(request, card_id):
-    account = Account.objects.get(user=request.user)
+    account = request.user_context.account
     credit_card = CreditCard.objects.get(card_id=card_id, user=request.user)
 
-    kyc = KYC.objects.get(user=request.user)
+    kyc = request.user_context.kyc
 
     context = {
         "account": account,
@@ -26,39 +26,37 @@ def fund_credit_card(request, card_id):
     if request.method == "POST":
         amount = request.POST.get("funding_amount")
 
-        if Decimal(amount) <= account.account_balance:
-            account.account_balance -= Decimal(amount)
-            account.save()
-
-            credit_card.amount += Decimal(amount)
-            credit_card.save()
-
-            messages.success(request, "Funding Successfull")
-            return redirect("core_apps.core:card-detail", credit_card.card_id)
-        else:
+        try:
+            balance.fund_card(account, credit_card, Decimal(amount))
+        except balance.InsufficientFunds:
             messages.warning(request, "Insufficient Funds")
             return redirect("core_apps.core:card-detail", credit_card.card_id)
+        except (InvalidOperation, TypeError, ValueError):
+            messages.warning(request, "Invalid amount")
+            return redirect("core_apps.core:card-detail", credit_card.card_id)
+
+        messages.success(request, "Funding Successfull")
+        return redirect("core_apps.core:card-detail", credit_card.card_id)
 
 
 def withdraw_fund(request, card_id):
-    account = Account.objects.get(user=request.user)
+    account = request.user.account
     credit_card = CreditCard.objects.get(card_id=card_id, user=request.user)
 
     if request.method == "POST":
         amount = request.POST.get("amount")
 
-        if credit_card.amount >= Decimal(amount):
-            account.account_balance += Decimal(amount)
-            account.save()
-
-            credit_card.amount -= Decimal(amount)
-            credit_card.save()
-
-            messages.success(request, "Withdraw Successful")
-            return redirect("core_apps.core:card-detail", credit_card.card_id)
-        else:
+        try:
+            balance.withdraw_from_card(account, credit_card, Decimal(amount))
+        except balance.InsufficientFunds:
             messages.warning(request, "Insufficient Funds")
             return redirect("core_apps.core:card-detail", credit_card.card_id)
+        except (InvalidOperation, TypeError, ValueError):
+            messages.warning(request, "Invalid amount")
+            return redirect("core_apps.core:card-detail", credit_card.card_id)
+
+        messages.success(request, "Withdraw Successful")
+        return redirect("core_apps.core:card-detail", credit_card.card_id)
 
 def delete_card(request, card_id):
     credit_card = CreditCard.objects.get(card_id=card_id, user=request.user)
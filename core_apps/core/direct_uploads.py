@@ -0,0 +1,141 @@
+"""
+Browser-to-storage uploads that bypass the web workers.
+
+The browser asks sign_upload for a short-lived upload target, sends the
+file there and calls confirm_upload. The form then submits only the signed
+key, and the worker reads the staged object from storage. On S3 the target
+is a presigned POST to the bucket. On any other backend it is local_upload,
+a signed stand-in URL served by Django. Objects left under incoming/ by
+abandoned forms should be expired by a bucket lifecycle rule.
+"""
+import os
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.template.defaultfilters import filesizeformat
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from core_apps.core.uploadhandlers import limits_for
+
+INCOMING_DIR = "incoming"
+SALT = "core.direct-upload"
+CONTENT_TYPES = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+
+
+def url_ttl():
+    """Seconds the browser has to start the upload"""
+    return getattr(settings, "DIRECT_UPLOAD_URL_TTL", 300)
+
+
+def key_ttl():
+    """Seconds a confirmed key stays valid for the form submission"""
+    return getattr(settings, "DIRECT_UPLOAD_KEY_TTL", 3600)
+
+
+def s3_storage():
+    try:
+        from storages.backends.s3boto3 import S3Boto3Storage
+    except ImportError:
+        return None
+    return default_storage if isinstance(default_storage, S3Boto3Storage) else None
+
+
+def make_token(user, key, name, field):
+    return signing.dumps({"key": key, "user": user.pk, "name": name, "field": field}, salt=SALT)
+
+
+def read_token(token, user, max_age=None):
+    """The payload of a token issued to user, or None if it is forged, expired or someone else's"""
+    try:
+        data = signing.loads(token, salt=SALT, max_age=max_age or key_ttl())
+    except signing.BadSignature:
+        return None
+    if data.get("user") != user.pk:
+        return None
+    return data
+
+
+def upload_target(key, content_type, max_size, token):
+    """(url, form fields) the browser POSTs the file to"""
+    storage = s3_storage()
+    if storage is None:
+        return reverse("core_apps.core:direct-upload-local", args=[token]), {}
+    target = storage.bucket.meta.client.generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=storage._normalize_name(key),
+        Fields={"Content-Type": content_type},
+        Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_size]],
+        ExpiresIn=url_ttl(),
+    )
+    return target["url"], target["fields"]
+
+
+@login_required
+@require_POST
+def sign_upload(request):
+    """Issue an upload target and key for one file"""
+    field = request.POST.get("field", "")
+    name = os.path.basename(request.POST.get("name", ""))[:100]
+    content_type = request.POST.get("content_type", "")
+    try:
+        size = int(request.POST.get("size", ""))
+    except ValueError:
+        return JsonResponse({"error": "Missing file size."}, status=400)
+
+    max_size, types = limits_for(field)
+    allowed = {CONTENT_TYPES[t] for t in types or CONTENT_TYPES}
+    if content_type not in allowed:
+        return JsonResponse({"error": "Upload a JPEG, PNG, GIF or WebP image."}, status=400)
+    if not 0 < size <= max_size:
+        return JsonResponse({"error": f"Files may not be larger than {filesizeformat(max_size)}."}, status=400)
+
+    extension = os.path.splitext(name)[1].lower()[:10]
+    key = f"{INCOMING_DIR}/{request.user.pk}/{uuid.uuid4().hex}{extension}"
+    token = make_token(request.user, key, name, field)
+    url, fields = upload_target(key, content_type, max_size, token)
+    return JsonResponse({"url": url, "fields": fields, "key": token})
+
+
+@csrf_exempt
+@require_POST
+def local_upload(request, token):
+    """Filesystem stand-in for the S3 presigned POST; the signed token is the only credential"""
+    try:
+        data = signing.loads(token, salt=SALT, max_age=url_ttl())
+    except signing.BadSignature:
+        return JsonResponse({"error": "Upload link expired."}, status=403)
+    upload = request.FILES.get("file")
+    if upload is None or getattr(upload, "upload_error", None):
+        return JsonResponse({"error": getattr(upload, "upload_error", "No file received.")}, status=400)
+    if default_storage.exists(data["key"]):
+        return JsonResponse({"error": "Upload link already used."}, status=403)
+    default_storage.save(data["key"], upload)
+    return JsonResponse({}, status=201)
+
+
+@login_required
+@require_POST
+def confirm_upload(request):
+    """Check the browser's upload arrived and is within limits before the form uses its key"""
+    data = read_token(request.POST.get("key", ""), request.user)
+    if data is None:
+        return JsonResponse({"error": "Upload expired, please choose the file again."}, status=400)
+    if not default_storage.exists(data["key"]):
+        return JsonResponse({"error": "The upload did not complete, please try again."}, status=400)
+    max_size, _ = limits_for(data["field"])
+    size = default_storage.size(data["key"])
+    if size > max_size:
+        default_storage.delete(data["key"])
+        return JsonResponse({"error": f"Files may not be larger than {filesizeformat(max_size)}."}, status=400)
+    return JsonResponse({"size": size})
@@ -0,0 +1,47 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+
+from core_apps.core.models import DRAFT_STATUSES, Transaction
+
+
+def draft_ttl():
+    return timedelta(seconds=getattr(settings, "TRANSFER_DRAFT_TTL", 60 * 60))
+
+
+def stale_drafts(status, cutoff, chunk_size=1000):
+    """Oldest drafts in one status created before cutoff, walked through txn_status_date_idx"""
+    return (
+        Transaction.objects.filter(status=status, date__lt=cutoff)
+        .order_by("date", "id")
+        .values_list("pk", flat=True)[:chunk_size]
+    )
+
+
+def expire_drafts(ttl=None, chunk_size=1000, statuses=DRAFT_STATUSES):
+    """
+    Mark unconfirmed transfer and request drafts older than ttl as expired.
+
+    Works through each status oldest first in (date, id) chunks so each
+    UPDATE only holds a short lock. Expired rows leave the status, so the
+    next chunk starts from the front of the index again without a cursor.
+    The status is re-checked in the UPDATE itself, so a draft confirmed
+    while the sweep runs is left alone.
+    """
+    if ttl is None:
+        ttl = draft_ttl()
+    cutoff = timezone.now() - ttl
+    expired = 0
+
+    for status in statuses:
+        while True:
+            pks = list(stale_drafts(status, cutoff, chunk_size))
+            if not pks:
+                break
+
+            expired += Transaction.objects.filter(pk__in=pks, status=status).update(
+                status="expired",
+                updated=timezone.now(),
+            )
+
+    return expired
@@ -0,0 +1,148 @@
+"""
+Cached answers to "what has this user paid for".
+
+for_user() combines two cache entries fetched in one get_many. One holds
+every plan, shared by all users. The other holds the user's subscription
+and whether they have a completed payment. Saving or deleting a
+SubscriptionPlan, UserSubscription or PaymentRequest drops the entries it
+affects once the transaction commits, so gated views make no entitlement
+queries until something changes. ENTITLEMENT_CACHE_TTL bounds how stale a
+per-process cache such as LocMemCache can get, since it never sees another
+process's invalidations.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import redirect
+from django.utils import timezone
+
+PLANS_KEY = "entitlements:plans"
+FEATURES = (
+    "has_analytics",
+    "has_priority_support",
+    "has_custom_branding",
+    "has_api_access",
+    "has_dedicated_manager",
+)
+
+
+def cache_ttl():
+    return getattr(settings, "ENTITLEMENT_CACHE_TTL", 300)
+
+
+def user_key(user_id):
+    return f"entitlements:user:{user_id}"
+
+
+class Entitlements:
+    """A user's effective plan, its features and whether they have paid"""
+
+    def __init__(self, plan=None, paid=False):
+        self.plan = plan
+        self.paid = paid
+        for feature in FEATURES:
+            setattr(self, feature, bool(plan is not None and getattr(plan, feature)))
+
+    @property
+    def plan_type(self):
+        return self.plan.plan_type if self.plan is not None else None
+
+    def allows(self, feature):
+        return bool(getattr(self, feature))
+
+
+def load_plans():
+    from core_apps.core.models import SubscriptionPlan
+
+    return {plan.pk: plan for plan in SubscriptionPlan.objects.all()}
+
+
+def load_status(user_id):
+    from core_apps.core.models import PaymentRequest, UserSubscription
+
+    subscription = UserSubscription.objects.filter(user_id=user_id).values(
+        "plan_id", "is_active", "current_period_end",
+    ).first() or {"plan_id": None, "is_active": False, "current_period_end": None}
+    subscription["paid"] = PaymentRequest.objects.filter(user_id=user_id, status="completed").exists()
+    return subscription
+
+
+def cached_plans(found=None):
+    plans = (found or {}).get(PLANS_KEY)
+    if plans is None:
+        plans = load_plans()
+        cache.set(PLANS_KEY, plans, cache_ttl())
+    return plans
+
+
+def active_plans():
+    """Plans on offer, cheapest first"""
+    return sorted((plan for plan in cached_plans().values() if plan.is_active), key=lambda plan: plan.price)
+
+
+def for_user(user):
+    if not user.is_authenticated:
+        return Entitlements()
+    key = user_key(user.pk)
+    found = cache.get_many([PLANS_KEY, key])
+    plans = cached_plans(found)
+    status = found.get(key)
+    if status is None:
+        status = load_status(user.pk)
+        cache.set(key, status, cache_ttl())
+
+    # Same rule as UserSubscription.is_valid, checked on every read so expiry needs no invalidation
+    period_end = status["current_period_end"]
+    valid = status["is_active"] and not (period_end and timezone.now() > period_end)
+    return Entitlements(plan=plans.get(status["plan_id"]) if valid else None, paid=status["paid"])
+
+
+#INVALIDATION
+
+def forget_plans(**kwargs):
+    transaction.on_commit(lambda: cache.delete(PLANS_KEY))
+
+
+def forget_user(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: cache.delete(user_key(user_id)))
+
+
+def forget_users(user_ids):
+    """For bulk writes, which send no signals"""
+    keys = [user_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def connect():
+    from django.db.models.signals import post_delete, post_save
+
+    from core_apps.core.models import PaymentRequest, SubscriptionPlan, UserSubscription
+
+    for signal in (post_save, post_delete):
+        name = "saved" if signal is post_save else "deleted"
+        signal.connect(forget_plans, sender=SubscriptionPlan, dispatch_uid=f"entitlements_plan_{name}")
+        for model in (UserSubscription, PaymentRequest):
+            signal.connect(forget_user, sender=model, dispatch_uid=f"entitlements_{model._meta.model_name}_{name}")
+
+
+def entitlement_required(feature, message="Your current plan does not include this feature.", redirect_to="core_apps.core:subscription-plans"):
+    """Decorator sending users whose entitlements lack feature (e.g. "paid", "has_analytics") to redirect_to"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                messages.warning(request, "You need to login to access this page.")
+                return redirect("core_apps.userauths:sign-in")
+
+            if not request.user_context.entitlements.allows(feature):
+                messages.warning(request, message)
+                return redirect(redirect_to)
+
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,6 +1,7 @@
 from django import forms
 from django.core.validators import FileExtensionValidator, MaxValueValidator
 from core_apps.core.models import CreditCard, GrantApplication, LoanApplication, PaymentRequest
+from core_apps.core.uploads import DeferredUploadsMixin
 
 class CreditCardForm(forms.ModelForm):
     name = forms.CharField(widget=forms.TextInput(attrs={"placeholder":"Card Holder Name"}))
@@ -13,7 +14,7 @@ class CreditCardForm(forms.ModelForm):
         model = CreditCard
         fields = ['name', 'number', 'month', 'year', 'cvv', 'card_type']
 
-class LoanApplicationForm(forms.ModelForm):
+class LoanApplicationForm(DeferredUploadsMixin, forms.ModelForm):
     amount_range_min = forms.DecimalField(
         max_digits=12, 
         decimal_places=2,
@@ -139,7 +140,7 @@ class LoanApplicationForm(forms.ModelForm):
         
         return cleaned_data
 
-class GrantApplicationForm(forms.ModelForm):
+class GrantApplicationForm(DeferredUploadsMixin, forms.ModelForm):
     amount_range_min = forms.DecimalField(
         max_digits=12, 
         decimal_places=2,
@@ -270,7 +271,7 @@ class GrantApplicationForm(forms.ModelForm):
         
         return cleaned_data
     
-class PaymentRequestForm(forms.ModelForm):
+class PaymentRequestForm(DeferredUploadsMixin, forms.ModelForm):
     class Meta:
         model = PaymentRequest
         fields = ['payment_type', 'reason', 'amount', 'payment_screenshot']
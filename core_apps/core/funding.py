@@ -4,64 +4,24 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.core.exceptions import ObjectDoesNotExist
 
-from core_apps.account.models import KYC
-from core_apps.core.models import LoanApplication, GrantApplication, PaymentRequest
+from core_apps.account.context import kyc_required
+from core_apps.core.models import LoanApplication, GrantApplication
 from core_apps.core.forms import LoanApplicationForm, GrantApplicationForm
+from core_apps.core import jobs, uploads
+from core_apps.core.entitlements import entitlement_required
 
-def get_user_kyc(user):
-    """Helper function to get KYC or return None"""
-    try:
-        return KYC.objects.get(user=user)
-    except KYC.DoesNotExist:
-        return None
-
-def kyc_required(view_func):
-    """Decorator to check if user has completed KYC"""
-    def wrapper(request, *args, **kwargs):
-        kyc = get_user_kyc(request.user)
-        if not kyc:
-            messages.warning(request, "You need to complete your KYC registration to access this page.")
-            return redirect("core_apps.account:kyc-reg")
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
-def require_completed_payment(view_func):
-    """
-    Decorator to require completed payment request before accessing view
-    """
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            messages.warning(request, "You need to login to access this page.")
-            return redirect("core_apps.userauths:sign-in")
-        
-        # Check KYC first
-        kyc = get_user_kyc(request.user)
-        if not kyc:
-            messages.warning(request, "You need to complete your KYC registration first.")
-            return redirect("core_apps.account:kyc-reg")
-        
-        # Then check payment
-        has_completed_payment = PaymentRequest.objects.filter(
-            user=request.user, 
-            status='completed'
-        ).exists()
-        
-        if not has_completed_payment:
-            messages.warning(
-                request, 
-                'You need to subscribe to a plan to access Grant or Loan applications.Contact Support for more details.'
-            )
-            return redirect('core_apps.core:subscription-plans')
-        
-        return view_func(request, *args, **kwargs)
-    return wrapper
+# Grant and loan applications are open to users with a completed payment request
+require_completed_payment = entitlement_required(
+    "paid",
+    "You need to subscribe to a plan to access Grant or Loan applications.Contact Support for more details.",
+)
 
 @login_required
 @kyc_required
 def funding_application(request):
     """Main funding application page with both loan and grant forms"""
     try:
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         loan_form = LoanApplicationForm()
         grant_form = GrantApplicationForm()
         
@@ -88,16 +48,17 @@ def funding_application(request):
 def submit_loan_application(request):
     """Handle loan application submission"""
     try:
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         if request.method == 'POST':
-            form = LoanApplicationForm(request.POST, request.FILES)
+            form = LoanApplicationForm(request.POST, request.FILES, uploader=request.user)
             if form.is_valid():
                 loan_application = form.save(commit=False)
                 loan_application.user = request.user
                 loan_application.save()
+                uploads.enqueue(form, loan_application, request.user)
                 
-                messages.success(request, "Loan application submitted successfully!")
+                messages.success(request, "Loan application submitted successfully! Your documents are being processed.")
                 return redirect('core_apps.core:application-submitted', app_type='loan', app_id=loan_application.id)
             else:
                 messages.error(request, 'Please correct the errors in the loan application form.')
@@ -125,16 +86,17 @@ def submit_loan_application(request):
 def submit_grant_application(request):
     """Handle grant application submission"""
     try:
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         if request.method == 'POST':
-            form = GrantApplicationForm(request.POST, request.FILES)
+            form = GrantApplicationForm(request.POST, request.FILES, uploader=request.user)
             if form.is_valid():
                 grant_application = form.save(commit=False)
                 grant_application.user = request.user
                 grant_application.save()
+                uploads.enqueue(form, grant_application, request.user)
                 
-                messages.success(request, "Grant application submitted successfully!")
+                messages.success(request, "Grant application submitted successfully! Your documents are being processed.")
                 return redirect('core_apps.core:application-submitted', app_type='grant', app_id=grant_application.id)
             else:
                 messages.error(request, 'Please correct the errors in the grant application form.')
@@ -161,9 +123,14 @@ def submit_grant_application(request):
 def application_status(request):
     """View to display user's loan and grant application status"""
     try:
-        kyc = get_user_kyc(request.user)
-        user_loans = LoanApplication.objects.filter(user=request.user).order_by('-application_date')
-        user_grants = GrantApplication.objects.filter(user=request.user).order_by('-application_date')
+        kyc = request.user_context.kyc
+        user_loans = list(LoanApplication.objects.filter(user=request.user).order_by('-application_date'))
+        user_grants = list(GrantApplication.objects.filter(user=request.user).order_by('-application_date'))
+
+        # Latest document processing job of each application
+        upload_jobs = jobs.latest_for(user_loans + user_grants)
+        for application in user_loans + user_grants:
+            application.upload_job = upload_jobs.get(jobs.target_key(application))
         
         context = {
             'user_loans': user_loans,
@@ -190,7 +157,7 @@ def application_submitted(request, app_type, app_id):
             messages.error(request, "Invalid application type.")
             return redirect('core_apps.core:funding-application')
         
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         context = {
             'application': application,
@@ -221,7 +188,7 @@ def application_detail(request, app_type, app_id):
             messages.error(request, "Invalid application type.")
             return redirect('core_apps.core:application-status')
         
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         context = {
             'application': application,
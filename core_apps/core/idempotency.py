@@ -0,0 +1,107 @@
+import hashlib
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core_apps.core.models import IdempotencyKey
+
+HEADER = "HTTP_IDEMPOTENCY_KEY"
+FORM_FIELD = "idempotency_key"
+MAX_KEY_LENGTH = 100
+
+
+class KeyReused(Exception):
+    """Raised when a live key comes back with a request that differs from the one it was issued for"""
+
+
+def new_key():
+    """Token rendered into a form so a resubmit carries the same key"""
+    return uuid.uuid4().hex
+
+
+def get_key(request):
+    """Idempotency-Key header, falling back to the hidden form field"""
+    key = request.META.get(HEADER) or request.POST.get(FORM_FIELD) or ""
+    key = key.strip()[:MAX_KEY_LENGTH]
+    return key or None
+
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+
+
+def fingerprint(*parts):
+    """Digest of the request fields a key is bound to, such as receiver, amount and description"""
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def replay(user, scope, key, request_fingerprint=""):
+    """
+    Transaction created by an earlier request with the same unexpired key, if any.
+
+    Raises KeyReused if that request had a different fingerprint.
+    """
+    claimed = (
+        IdempotencyKey.objects.filter(user=user, scope=scope, key=key, expires_at__gt=timezone.now())
+        .select_related("transaction")
+        .first()
+    )
+    if claimed is None:
+        return None
+    if claimed.fingerprint != request_fingerprint:
+        raise KeyReused("This form was already submitted with different details.")
+    return claimed.transaction
+
+
+def create_once(user, scope, key, create, request_fingerprint=""):
+    """
+    Run create() at most once per (user, scope, key).
+
+    Returns (transaction, created). A retry with a key that is still live
+    gets the original transaction back without calling create() again, as
+    long as its fingerprint matches; a changed request raises KeyReused.
+    Requests without a key behave exactly as before.
+    """
+    if not key:
+        return create(), True
+
+    for attempt in range(2):
+        existing = replay(user, scope, key, request_fingerprint)
+        if existing is not None:
+            return existing, False
+
+        try:
+            with transaction.atomic():
+                txn = create()
+                IdempotencyKey.objects.create(
+                    user=user,
+                    scope=scope,
+                    key=key,
+                    fingerprint=request_fingerprint,
+                    transaction=txn,
+                    expires_at=timezone.now() + key_ttl(),
+                )
+            return txn, True
+        except IntegrityError:
+            # Either a concurrent request won the race, or an expired key
+            # that has not been purged yet is still holding the slot
+            if replay(user, scope, key, request_fingerprint) is None:
+                IdempotencyKey.objects.filter(user=user, scope=scope, key=key, expires_at__lte=timezone.now()).delete()
+
+    raise IntegrityError(f"Could not claim idempotency key {key}.")
+
+
+def purge_expired(batch_size=1000):
+    """Delete expired keys a batch at a time so the table is never locked for long"""
+    deleted = 0
+    while True:
+        pks = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,122 @@
+"""
+Database-backed job queue.
+
+A Job names its handler by dotted path and carries a JSON payload. Workers
+started by run_workers claim queued jobs with a conditional UPDATE, so any
+number of processes share the table without holding row locks, and a job
+whose worker died is handed out again once its lease runs out.
+"""
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core_apps.core.models import Job
+
+
+class Rejected(Exception):
+    """Raised by a handler for input that can never succeed; the job fails without retrying"""
+
+
+def lease_seconds():
+    return getattr(settings, "JOB_LEASE_SECONDS", 600)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=getattr(settings, "JOB_RETRY_DELAY", 30) * 2 ** (attempts - 1))
+
+
+def target_key(instance):
+    return instance._meta.label_lower, str(instance.pk)
+
+
+def enqueue(handler, payload, user=None, target=None, max_attempts=3):
+    target_type, target_id = target_key(target) if target is not None else ("", "")
+    return Job.objects.create(
+        handler=handler,
+        payload=payload,
+        user=user,
+        target_type=target_type,
+        target_id=target_id,
+        max_attempts=max_attempts,
+    )
+
+
+def latest_for(instances):
+    """Most recent job for each instance, keyed by target_key()"""
+    keys = {target_key(instance) for instance in instances}
+    if not keys:
+        return {}
+    jobs = Job.objects.filter(
+        target_type__in={target_type for target_type, _ in keys},
+        target_id__in={target_id for _, target_id in keys},
+    ).order_by("id")
+    # Later jobs overwrite earlier ones for the same target
+    return {(job.target_type, job.target_id): job for job in jobs if (job.target_type, job.target_id) in keys}
+
+
+def claim(worker):
+    """Mark the oldest runnable job as ours and return it, or None if there is nothing to do"""
+    now = timezone.now()
+    candidates = Job.objects.filter(status="queued", run_after__lte=now).order_by("id").values_list("pk", flat=True)[:10]
+    for pk in candidates:
+        # Another worker may have taken it since the SELECT; only one UPDATE can win
+        claimed = Job.objects.filter(pk=pk, status="queued").update(
+            status="running", worker=worker, started_at=now, attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def release_expired():
+    """Requeue, or fail when out of attempts, jobs whose worker stopped before finishing them"""
+    expired = Job.objects.filter(status="running", started_at__lt=timezone.now() - timedelta(seconds=lease_seconds()))
+    requeued = expired.filter(attempts__lt=F("max_attempts")).update(status="queued", worker="")
+    expired.update(status="failed", worker="", error="Worker stopped before finishing.", finished_at=timezone.now())
+    return requeued
+
+
+def finish(job, **fields):
+    # A job whose lease ran out may belong to another worker by now
+    Job.objects.filter(pk=job.pk, status="running", worker=job.worker).update(**fields)
+
+
+def run(job):
+    try:
+        result = import_string(job.handler)(job.payload)
+    except Rejected as e:
+        finish(job, status="failed", error=str(e), result={"rejected": True}, finished_at=timezone.now())
+    except Exception as e:
+        print(f"Job {job.pk} error: {traceback.format_exc()}")
+        error = f"{e.__class__.__name__}: {e}"
+        if job.attempts >= job.max_attempts:
+            finish(job, status="failed", error=error, finished_at=timezone.now())
+        else:
+            finish(job, status="queued", error=error, worker="", run_after=timezone.now() + retry_delay(job.attempts))
+    else:
+        finish(job, status="done", result=result or {}, error="", finished_at=timezone.now())
+
+
+def work(worker, should_stop, poll_interval=1.0, drain=False):
+    """Run jobs until should_stop() is true, or the queue is empty with drain; returns how many ran"""
+    processed = 0
+    while not should_stop():
+        close_old_connections()
+        job = claim(worker)
+        if job is None:
+            if release_expired():
+                continue
+            if drain:
+                break
+            time.sleep(poll_interval)
+            continue
+        run(job)
+        processed += 1
+    close_old_connections()
+    return processed
@@ -0,0 +1,218 @@
+import uuid
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core_apps.account.models import Account
+from core_apps.core.models import BalanceSnapshot, LedgerEntry
+
+ZERO = Decimal("0.00")
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+CREDITS = Coalesce(Sum("amount", filter=Q(direction="credit")), Value(ZERO), output_field=MONEY)
+DEBITS = Coalesce(Sum("amount", filter=Q(direction="debit")), Value(ZERO), output_field=MONEY)
+
+
+class UnbalancedJournal(Exception):
+    """Raised when the debit and credit legs of a journal do not match"""
+
+
+def account_leg(account, direction, amount):
+    """Leg against a customer account"""
+    return {"account": account, "ledger_account": f"account:{account.pk}", "direction": direction, "amount": Decimal(amount)}
+
+
+def external_leg(code, direction, amount):
+    """Leg against a bank side account such as a card, a debt or a clearing account"""
+    return {"account": None, "ledger_account": code, "direction": direction, "amount": Decimal(amount)}
+
+
+def post_many(journals):
+    """
+    Write several balanced journals in one INSERT.
+
+    journals is an iterable of (entry_type, legs, txn). Must run inside the
+    same atomic block as the balance change.
+    """
+    entries = []
+    for entry_type, legs, txn in journals:
+        debits = sum((leg["amount"] for leg in legs if leg["direction"] == "debit"), ZERO)
+        credits = sum((leg["amount"] for leg in legs if leg["direction"] == "credit"), ZERO)
+        if debits != credits or debits <= 0:
+            raise UnbalancedJournal(f"Debits {debits} do not match credits {credits}.")
+
+        journal_id = uuid.uuid4().hex
+        entries.extend(
+            LedgerEntry(journal_id=journal_id, entry_type=entry_type, transaction=txn, **leg)
+            for leg in legs
+        )
+    return LedgerEntry.objects.bulk_create(entries)
+
+
+def post(entry_type, legs, txn=None):
+    """Write one balanced journal"""
+    return post_many([(entry_type, legs, txn)])
+
+
+def transfer_journal(txn, sender_account, receiver_account, amount):
+    entry_type = "settlement" if txn is not None and txn.transaction_type == "request" else "transfer"
+    return entry_type, [
+        account_leg(sender_account, "debit", amount),
+        account_leg(receiver_account, "credit", amount),
+    ], txn
+
+
+def post_transfer(txn, sender_account, receiver_account, amount):
+    """Journal for a completed transfer or a settled payment request"""
+    return post_many([transfer_journal(txn, sender_account, receiver_account, amount)])
+
+
+def post_card_funding(account, credit_card, amount):
+    return post("card_funding", [
+        account_leg(account, "debit", amount),
+        external_leg(f"card:{credit_card.card_id}", "credit", amount),
+    ])
+
+
+def post_card_withdrawal(account, credit_card, amount):
+    return post("card_withdrawal", [
+        external_leg(f"card:{credit_card.card_id}", "debit", amount),
+        account_leg(account, "credit", amount),
+    ])
+
+
+def post_debt_payment(sender, instance, created, **kwargs):
+    """Journal a completed debt payment recorded against a debt."""
+    if not created or instance.status != "completed" or instance.amount <= 0:
+        return
+    post("debt_payment", [
+        external_leg("clearing:debt_repayments", "debit", instance.amount),
+        external_leg(f"debt:{instance.debt_id}", "credit", instance.amount),
+    ])
+
+
+def net_movement(entries):
+    """Credits minus debits over a queryset of entries"""
+    totals = entries.aggregate(credits=CREDITS, debits=DEBITS)
+    return totals["credits"] - totals["debits"]
+
+
+def latest_snapshot(account, at=None):
+    snapshots = BalanceSnapshot.objects.filter(account=account)
+    if at is not None:
+        snapshots = snapshots.filter(taken_at__lte=at)
+    return snapshots.order_by("-last_entry_id", "-id").first()
+
+
+def balance_as_of(account, at=None):
+    """
+    Ledger balance of an account at a point in time.
+
+    Starts from the closest snapshot and only sums the entries written after
+    it, so the cost does not grow with the account's full history.
+    """
+    snapshot = latest_snapshot(account, at)
+    entries = LedgerEntry.objects.filter(account=account)
+    if at is not None:
+        entries = entries.filter(created_at__lte=at)
+
+    opening = ZERO
+    if snapshot:
+        opening = snapshot.balance
+        entries = entries.filter(id__gt=snapshot.last_entry_id)
+
+    return opening + net_movement(entries)
+
+
+def _accounts_with_cursor(accounts):
+    """Annotate accounts with their latest snapshot balance and cursor"""
+    latest = BalanceSnapshot.objects.filter(account=OuterRef("pk")).order_by("-last_entry_id", "-id")
+    return accounts.annotate(
+        snapshot_balance=Subquery(latest.values("balance")[:1]),
+        snapshot_cursor=Subquery(latest.values("last_entry_id")[:1]),
+    )
+
+
+def _iter_account_chunks(chunk_size):
+    """Walk every account in primary key order with its snapshot cursor"""
+    last_pk = None
+    while True:
+        accounts = _accounts_with_cursor(Account.objects.order_by("pk"))
+        if last_pk is not None:
+            accounts = accounts.filter(pk__gt=last_pk)
+        chunk = list(accounts.values("pk", "account_balance", "snapshot_balance", "snapshot_cursor")[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1]["pk"]
+
+
+def _movements_since(chunk, upto_id):
+    """Net ledger movement per account after each account's own snapshot cursor"""
+    by_cursor = {}
+    for row in chunk:
+        by_cursor.setdefault(row["snapshot_cursor"] or 0, []).append(row["pk"])
+
+    movements = {}
+    for cursor, pks in by_cursor.items():
+        entries = LedgerEntry.objects.filter(account__in=pks, id__gt=cursor)
+        if upto_id is not None:
+            entries = entries.filter(id__lte=upto_id)
+        for row in entries.values("account").annotate(credits=CREDITS, debits=DEBITS):
+            movements[row["account"]] = row["credits"] - row["debits"]
+    return movements
+
+
+def take_snapshots(chunk_size=1000, opening=False):
+    """
+    Checkpoint the ledger balance of every account that moved since its last snapshot.
+
+    Run once with opening=True when the ledger is introduced: accounts that
+    have no snapshot yet are seeded from their current account_balance so
+    money that predates the ledger is carried in as an opening balance.
+
+    Each chunk reads its balances and the entry cursor under the account
+    locks, so a transfer lands either wholly before the snapshot or wholly
+    after it and is never counted twice.
+    """
+    from core_apps.core.balance import lock_balances
+
+    taken_at = timezone.now()
+    created = 0
+
+    for chunk in _iter_account_chunks(chunk_size):
+        with transaction.atomic():
+            balances = lock_balances(row["pk"] for row in chunk)
+            # Taken after the locks: every entry for these accounts has committed
+            upto_id = LedgerEntry.objects.aggregate(last=Max("id"))["last"] or 0
+            movements = _movements_since(chunk, upto_id)
+            snapshots = []
+            for row in chunk:
+                if row["pk"] not in balances:
+                    continue
+                movement = movements.get(row["pk"], ZERO)
+                if row["snapshot_cursor"] is None and opening:
+                    # Opening balance sits before the first entry and replays to account_balance
+                    snapshots.append(BalanceSnapshot(account_id=row["pk"], balance=balances[row["pk"]] - movement, last_entry_id=0, taken_at=taken_at))
+                elif movement:
+                    # Accounts opened after the ledger start from zero
+                    previous = row["snapshot_balance"] or ZERO
+                    snapshots.append(BalanceSnapshot(account_id=row["pk"], balance=previous + movement, last_entry_id=upto_id, taken_at=taken_at))
+
+            BalanceSnapshot.objects.bulk_create(snapshots)
+        created += len(snapshots)
+
+    return created
+
+
+def reconcile(chunk_size=1000):
+    """Yield (account_pk, stored_balance, ledger_balance) for every account that disagrees with its ledger"""
+    for chunk in _iter_account_chunks(chunk_size):
+        movements = _movements_since(chunk, None)
+        for row in chunk:
+            ledger_balance = (row["snapshot_balance"] or ZERO) + movements.get(row["pk"], ZERO)
+            if ledger_balance != row["account_balance"]:
+                yield row["pk"], row["account_balance"], ledger_balance
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core_apps.core import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily account rollup from settled transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--since", help="Only rebuild days from this date (YYYY-MM-DD) onwards")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError(f"Invalid date: {options['since']}")
+
+        processed = rollups.rebuild(chunk_size=options["chunk_size"], since=since)
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {processed} transactions."))
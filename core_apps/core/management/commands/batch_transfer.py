@@ -0,0 +1,38 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_apps.account.models import Account
+from core_apps.core.batch_transfer import RESULT_FIELDS, parse_rows, run_batch
+
+
+class Command(BaseCommand):
+    help = "Pay every row of a CSV or JSON file from one account"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file with account_number, amount and description")
+        parser.add_argument("--sender", required=True, help="Account number to pay from")
+        parser.add_argument("--format", choices=["csv", "json"], help="Defaults to the file extension")
+
+    def handle(self, *args, **options):
+        try:
+            sender_account = Account.objects.select_related("user").get(account_number=options["sender"])
+        except Account.DoesNotExist:
+            raise CommandError(f"Account {options['sender']} does not exist.")
+
+        path = options["path"]
+        fmt = options["format"] or ("json" if path.lower().endswith(".json") else "csv")
+        with open(path, "rb") as f:
+            try:
+                rows = parse_rows(f.read(), fmt)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        results = run_batch(sender_account.user, sender_account, rows)
+
+        writer = csv.DictWriter(self.stdout, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+        completed = sum(1 for result in results if result["status"] == "completed")
+        self.stderr.write(f"{completed} of {len(results)} rows completed.")
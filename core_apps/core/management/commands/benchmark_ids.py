@@ -0,0 +1,69 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from shortuuid import ShortUUID
+
+from core_apps.core import ids
+from core_apps.core.models import Transaction
+
+
+class Rollback(Exception):
+    pass
+
+
+def random_transaction_ids(count):
+    """What ShortUUIDField(length=15, prefix="TRN") used to generate"""
+    generator = ShortUUID()
+    return ["TRN" + generator.random(length=15) for _ in range(count)]
+
+
+STRATEGIES = {
+    "random": random_transaction_ids,
+    "time-ordered": ids.transaction_ids,
+}
+
+
+class Command(BaseCommand):
+    help = "Compare Transaction insert throughput with random and time-ordered transaction IDs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def generation(self, name, generate, rows):
+        started = time.perf_counter()
+        generate(rows)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{name:>14} generate: {rows / elapsed:12,.0f} ids/s")
+
+    def inserts(self, name, generate, rows, batch_size):
+        """Insert rows in batches and roll them all back, returning rows per second"""
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                for offset in range(0, rows, batch_size):
+                    count = min(batch_size, rows - offset)
+                    Transaction.objects.bulk_create(
+                        [Transaction(transaction_id=transaction_id, transaction_type="none") for transaction_id in generate(count)],
+                        batch_size=batch_size,
+                    )
+                elapsed = time.perf_counter() - started
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(f"{name:>14} insert:   {rows / elapsed:12,.0f} rows/s")
+
+    def handle(self, *args, **options):
+        rows, batch_size = options["rows"], options["batch_size"]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Transaction IDs, {rows:,} rows"))
+        for name, generate in STRATEGIES.items():
+            self.generation(name, generate, rows)
+        for name, generate in STRATEGIES.items():
+            self.inserts(name, generate, rows, batch_size)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Account UUIDs, {rows:,} ids"))
+        self.generation("uuid4", lambda count: [uuid.uuid4() for _ in range(count)], rows)
+        self.generation("uuid7", ids.uuid7s, rows)
@@ -0,0 +1,20 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core_apps.core import blobstore
+
+
+class Command(BaseCommand):
+    help = "Delete stored blobs that no file field references any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recount", action="store_true", help="Recompute reference counts from the file fields first")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["recount"]:
+            changed = blobstore.recount(apps.get_models())
+            self.stdout.write(f"Corrected {changed} reference counts.")
+        removed = blobstore.collect(dry_run=options["dry_run"])
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(removed)} unreferenced blobs."))
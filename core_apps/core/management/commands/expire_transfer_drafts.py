@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core_apps.core import drafts
+
+
+class Command(BaseCommand):
+    help = "Expire transfer and payment request drafts that were never confirmed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ttl-minutes", type=int, help="Defaults to TRANSFER_DRAFT_TTL")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        ttl = timedelta(minutes=options["ttl_minutes"]) if options["ttl_minutes"] is not None else None
+        expired = drafts.expire_drafts(ttl=ttl, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} drafts."))
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core_apps.core import drafts
+from core_apps.core.models import DRAFT_STATUSES, Transaction
+from core_apps.core.transaction import TABS, tab_queryset
+from core_apps.userauths.models import User
+
+# What a full table scan looks like in each backend's EXPLAIN output
+FULL_SCAN_MARKERS = {
+    "sqlite": "SCAN core_transaction",
+    "postgresql": "Seq Scan on core_transaction",
+}
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot Transaction queries and check that they use an index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Exit with an error if any query scans the whole table")
+
+    def queries(self):
+        user = User(pk=0)
+        for tab in TABS:
+            yield f"history tab {tab}", tab_queryset(user, tab).order_by("-date", "-id")[:21]
+
+        cutoff = timezone.now() - timedelta(hours=1)
+        for status in DRAFT_STATUSES:
+            yield f"draft sweeper {status}", drafts.stale_drafts(status, cutoff)
+        yield "transfer confirmation", Transaction.objects.filter(transaction_id="TRN0", user=user)
+
+    def handle(self, *args, **options):
+        marker = FULL_SCAN_MARKERS.get(connection.vendor)
+        full_scans = []
+
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Tiny tables make a seq scan the cheapest plan; ask what would happen at scale
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, queryset in self.queries():
+                plan = queryset.explain()
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(plan)
+                if marker and any(line.strip().endswith(marker) or marker + " " in line for line in plan.splitlines()):
+                    full_scans.append(name)
+
+        if options["check"] and full_scans:
+            raise CommandError(f"Full table scan in: {', '.join(full_scans)}")
+        if marker:
+            self.stdout.write(self.style.SUCCESS("No full table scans.") if not full_scans else self.style.WARNING(f"Full table scan in: {', '.join(full_scans)}"))
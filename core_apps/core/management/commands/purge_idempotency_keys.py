@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core_apps.core import idempotency
+
+
+class Command(BaseCommand):
+    help = "Delete expired idempotency keys in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core_apps.core import ledger
+
+
+class Command(BaseCommand):
+    help = "Compare every account_balance with its ledger balance"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        mismatches = 0
+        for account_pk, stored, expected in ledger.reconcile(chunk_size=options["chunk_size"]):
+            mismatches += 1
+            self.stdout.write(f"{account_pk}: account_balance={stored} ledger={expected}")
+
+        if mismatches:
+            raise CommandError(f"{mismatches} accounts do not match the ledger.")
+        self.stdout.write(self.style.SUCCESS("All accounts match the ledger."))
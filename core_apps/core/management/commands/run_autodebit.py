@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core_apps.core import autodebit
+
+
+class Command(BaseCommand):
+    help = "Take due debt installments from account balances"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Collect installments due by this ISO date instead of today")
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        today = None
+        if options["date"]:
+            today = parse_date(options["date"])
+            if today is None:
+                raise CommandError("--date must be an ISO date.")
+
+        started = time.monotonic()
+        made, collected = autodebit.run(today, size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Collected {collected} in {made} debt payments in {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core_apps.core import billing
+
+
+class Command(BaseCommand):
+    help = "Renew subscriptions whose period has ended and expire canceled or unpaid ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", help="Bill periods ending by this ISO datetime instead of now")
+        parser.add_argument("--chunk-size", type=int, default=None)
+        parser.add_argument(
+            "--processor",
+            default=None,
+            help=f"{', '.join(billing.PROCESSORS)} or a dotted class path (default: BILLING_PROCESSOR setting or balance)",
+        )
+        parser.add_argument("--resume", action="store_true", help="Continue the last unfinished run from its cursor")
+
+    def handle(self, *args, **options):
+        unfinished = billing.unfinished_run()
+        if options["resume"]:
+            if unfinished is None:
+                raise CommandError("There is no unfinished billing run to resume.")
+            run = unfinished
+            self.stdout.write(f"Resuming billing run #{run.pk} as of {run.as_of:%Y-%m-%d %H:%M}.")
+        else:
+            if unfinished is not None:
+                raise CommandError(f"Billing run #{unfinished.pk} is unfinished; pass --resume to continue it.")
+            as_of = None
+            if options["as_of"]:
+                as_of = parse_datetime(options["as_of"])
+                if as_of is None:
+                    raise CommandError("--as-of must be an ISO datetime.")
+                if timezone.is_naive(as_of):
+                    as_of = timezone.make_aware(as_of)
+            processor = options["processor"] or billing.default_processor()
+            try:
+                billing.get_processor(processor)
+            except ImportError as e:
+                raise CommandError(f"Unknown processor {processor}: {e}")
+            run = billing.start_run(processor, as_of)
+
+        started = time.monotonic()
+
+        def progress(run):
+            done = run.renewed + run.expired + run.failed
+            rate = done / max(time.monotonic() - started, 0.001) * 60
+            self.stdout.write(f"  {done} processed ({rate:,.0f}/min)")
+
+        run = billing.run_cycle(run, size=options["chunk_size"], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Billing run #{run.pk}: {run.renewed} renewed, {run.failed} failed to pay, "
+            f"{run.expired} expired, {run.charged} charged."
+        ))
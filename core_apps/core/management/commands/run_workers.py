@@ -0,0 +1,52 @@
+import multiprocessing
+import os
+import signal
+import socket
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core_apps.core import jobs
+
+
+def worker_main(stop, poll_interval, drain):
+    # Ctrl-C reaches the whole process group; let the parent decide when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    jobs.work(f"{socket.gethostname()}:{os.getpid()}", stop.is_set, poll_interval, drain)
+
+
+class Command(BaseCommand):
+    help = "Run a pool of worker processes executing queued jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        processes, poll_interval, drain = options["processes"], options["poll_interval"], options["drain"]
+        jobs.release_expired()
+
+        # Forked children must open their own database connections
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        stop = context.Event()
+        workers = [
+            context.Process(target=worker_main, args=(stop, poll_interval, drain), daemon=True)
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {processes} workers.")
+
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the current jobs...")
+            stop.set()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
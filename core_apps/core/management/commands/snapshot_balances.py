@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core_apps.core import ledger
+
+
+class Command(BaseCommand):
+    help = "Checkpoint per-account ledger balances"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--opening",
+            action="store_true",
+            help="Seed accounts without a snapshot from their current account_balance",
+        )
+
+    def handle(self, *args, **options):
+        created = ledger.take_snapshots(chunk_size=options["chunk_size"], opening=options["opening"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} balance snapshots."))
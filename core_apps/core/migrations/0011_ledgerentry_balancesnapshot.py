@@ -0,0 +1,47 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0008_debt_debtpayment'),
+        ('core', '0010_paymentrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('journal_id', models.CharField(db_index=True, max_length=32)),
+                ('entry_type', models.CharField(choices=[('transfer', 'Transfer'), ('settlement', 'Request Settlement'), ('card_funding', 'Card Funding'), ('card_withdrawal', 'Card Withdrawal'), ('debt_payment', 'Debt Payment')], max_length=30)),
+                ('ledger_account', models.CharField(max_length=100)),
+                ('direction', models.CharField(choices=[('debit', 'Debit'), ('credit', 'Credit')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='account.account')),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='core.transaction')),
+            ],
+            options={
+                'verbose_name_plural': 'Ledger entries',
+                'indexes': [models.Index(fields=['account', 'id'], name='ledger_account_id_idx'), models.Index(fields=['ledger_account', 'id'], name='ledger_code_id_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('last_entry_id', models.BigIntegerField(default=0)),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='account.account')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', '-taken_at'], name='snapshot_account_taken_idx')],
+            },
+        ),
+    ]
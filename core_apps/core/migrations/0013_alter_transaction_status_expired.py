@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='status',
+            field=models.CharField(choices=[('failed', 'Failed'), ('completed', 'Completed'), ('pending', 'Pending'), ('processing', 'Processing'), ('request_sent', 'Requested Sent'), ('requested_settled', 'Requested Settled'), ('request_processing', 'Request Processing'), ('expired', 'Expired')], default='none', max_length=100),
+        ),
+    ]
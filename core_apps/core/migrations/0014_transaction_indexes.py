@@ -0,0 +1,29 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_alter_transaction_status_expired'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['sender', 'transaction_type', '-date', '-id'], name='txn_sender_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('transaction_type', 'transfer')), fields=['receiver', '-date', '-id'], name='txn_recv_transfer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('transaction_type', 'request')), fields=['receiver', '-date', '-id'], name='txn_recv_request_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('status__in', ('processing', 'request_processing'))), fields=['date', 'id'], name='txn_draft_date_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0009_alter_debt_debt_type'),
+        ('core', '0014_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAccountRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('direction', models.CharField(choices=[('in', 'Money In'), ('out', 'Money Out')], max_length=3)),
+                ('transaction_type', models.CharField(choices=[('transfer', 'Transfer'), ('recieved', 'Recieved'), ('withdraw', 'Withdraw'), ('refund', 'Refund'), ('request', 'Payment Request'), ('none', 'None')], max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='account.account')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyaccountrollup',
+            constraint=models.UniqueConstraint(fields=('account', 'day', 'direction', 'transaction_type'), name='unique_daily_rollup'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:42
+
+import core_apps.core.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_dailyaccountrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_id',
+            field=models.CharField(default=core_apps.core.ids.transaction_id, max_length=20, unique=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0016_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('handler', models.CharField(max_length=255)),
+                ('payload', models.JSONField(default=dict)),
+                ('result', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('target_type', models.CharField(blank=True, max_length=100)),
+                ('target_id', models.CharField(blank=True, max_length=64)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=3)),
+                ('error', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after', 'id'], name='job_runnable_idx'), models.Index(fields=['target_type', 'target_id'], name='job_target_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:57
+
+import core_apps.core.blobstore
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('source_sha256', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='grantapplication',
+            name='additional_documents',
+            field=models.ImageField(blank=True, null=True, storage=core_apps.core.blobstore.get_storage, upload_to='grants/additional/'),
+        ),
+        migrations.AlterField(
+            model_name='grantapplication',
+            name='identification_image',
+            field=models.ImageField(storage=core_apps.core.blobstore.get_storage, upload_to='grants/identification/'),
+        ),
+        migrations.AlterField(
+            model_name='grantapplication',
+            name='proposal_document',
+            field=models.ImageField(storage=core_apps.core.blobstore.get_storage, upload_to='grants/proposals/'),
+        ),
+        migrations.AlterField(
+            model_name='loanapplication',
+            name='additional_documents',
+            field=models.ImageField(blank=True, null=True, storage=core_apps.core.blobstore.get_storage, upload_to='loans/additional/'),
+        ),
+        migrations.AlterField(
+            model_name='loanapplication',
+            name='identification_image',
+            field=models.ImageField(storage=core_apps.core.blobstore.get_storage, upload_to='loans/identification/'),
+        ),
+        migrations.AlterField(
+            model_name='loanapplication',
+            name='proof_of_income',
+            field=models.ImageField(storage=core_apps.core.blobstore.get_storage, upload_to='loans/income_proof/'),
+        ),
+        migrations.AlterField(
+            model_name='paymentrequest',
+            name='payment_screenshot',
+            field=models.ImageField(storage=core_apps.core.blobstore.get_storage, upload_to='payment_screenshots/'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.2 on 2026-10-17 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_stored_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField()),
+                ('processor', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('failed', 'Failed'), ('done', 'Done')], default='running', max_length=10)),
+                ('cursor_period_end', models.DateTimeField(blank=True, null=True)),
+                ('cursor_id', models.BigIntegerField(default=0)),
+                ('renewed', models.PositiveIntegerField(default=0)),
+                ('expired', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('charged', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='entry_type',
+            field=models.CharField(choices=[('transfer', 'Transfer'), ('settlement', 'Request Settlement'), ('card_funding', 'Card Funding'), ('card_withdrawal', 'Card Withdrawal'), ('debt_payment', 'Debt Payment'), ('subscription', 'Subscription Renewal')], max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='usersubscription',
+            index=models.Index(fields=['is_active', 'current_period_end', 'id'], name='subscription_due_idx'),
+        ),
+    ]
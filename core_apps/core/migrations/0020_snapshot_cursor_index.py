@@ -0,0 +1,21 @@
+# Generated by Django 4.2.2 on 2026-10-17 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_billing_runs'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='balancesnapshot',
+            name='snapshot_account_taken_idx',
+        ),
+        migrations.AddIndex(
+            model_name='balancesnapshot',
+            index=models.Index(fields=['account', '-last_entry_id', '-id'], name='snapshot_account_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-17 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_snapshot_cursor_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
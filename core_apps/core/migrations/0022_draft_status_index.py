@@ -0,0 +1,21 @@
+# Generated by Django 4.2.2 on 2026-10-17 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_idempotency_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='txn_draft_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'date', 'id'], name='txn_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.2 on 2026-10-17 01:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_debt_payment_transactions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyaccountrollup',
+            name='transaction_type',
+            field=models.CharField(choices=[('transfer', 'Transfer'), ('recieved', 'Recieved'), ('withdraw', 'Withdraw'), ('refund', 'Refund'), ('request', 'Payment Request'), ('debt_payment', 'Debt Payment'), ('subscription', 'Subscription'), ('none', 'None')], max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('transfer', 'Transfer'), ('recieved', 'Recieved'), ('withdraw', 'Withdraw'), ('refund', 'Refund'), ('request', 'Payment Request'), ('debt_payment', 'Debt Payment'), ('subscription', 'Subscription'), ('none', 'None')], default='none', max_length=100),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.dispatch import receiver
 from django.db.models.signals import post_save
 from core_apps.userauths.models import User
 from core_apps.account.models import Account
+from core_apps.core import blobstore, ids
 from shortuuid.django_fields import ShortUUIDField
 
 
@@ -13,6 +14,8 @@ TRANSACTION_TYPE = (
     ("withdraw", "Withdraw"),
     ("refund", "Refund"),
     ("request", "Payment Request"),
+    ("debt_payment", "Debt Payment"),
+    ("subscription", "Subscription"),
     ("none", "None")
 )
 
@@ -24,8 +27,12 @@ TRANSACTION_STATUS = (
     ("request_sent", "Requested Sent"),
     ("requested_settled", "Requested Settled"),
     ("request_processing", "Request Processing"),
+    ("expired", "Expired"),
 )
 
+# Drafts created before the user confirms with their PIN
+DRAFT_STATUSES = ("processing", "request_processing")
+
 
 CARD_TYPE = (
     ("master", "Master Card"),
@@ -34,7 +41,7 @@ CARD_TYPE = (
 )
 
 class Transaction(models.Model):
-    transaction_id = ShortUUIDField(unique=True, length=15, max_length=20, prefix="TRN")
+    transaction_id = models.CharField(unique=True, max_length=20, default=ids.transaction_id)
     
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="user")
     amount = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
@@ -52,6 +59,25 @@ class Transaction(models.Model):
     date = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now_add=False, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # History tabs: sent transfers and sent requests, newest first
+            models.Index(fields=["sender", "transaction_type", "-date", "-id"], name="txn_sender_type_date_idx"),
+            # History tabs: received transfers / received requests
+            models.Index(
+                fields=["receiver", "-date", "-id"],
+                name="txn_recv_transfer_date_idx",
+                condition=models.Q(transaction_type="transfer"),
+            ),
+            models.Index(
+                fields=["receiver", "-date", "-id"],
+                name="txn_recv_request_date_idx",
+                condition=models.Q(transaction_type="request"),
+            ),
+            # Draft sweeper: oldest rows of one status first
+            models.Index(fields=["status", "date", "id"], name="txn_status_date_idx"),
+        ]
+
     def __str__(self):
         try:
             return f"{self.user}"
@@ -132,10 +158,42 @@ class UserSubscription(models.Model):
             return False
         return True
     
+    class Meta:
+        indexes = [
+            # Keyset order of run_billing_cycle
+            models.Index(fields=["is_active", "current_period_end", "id"], name="subscription_due_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.plan.name if self.plan else 'No Plan'}"
 
 
+BILLING_RUN_STATUS = (
+    ("running", "Running"),
+    ("failed", "Failed"),
+    ("done", "Done"),
+)
+
+class BillingRun(models.Model):
+    """One run_billing_cycle pass over subscriptions due by as_of; the cursor lets an interrupted run resume"""
+    as_of = models.DateTimeField()
+    processor = models.CharField(max_length=255)
+    status = models.CharField(choices=BILLING_RUN_STATUS, max_length=10, default="running")
+    # Last (current_period_end, id) fully processed
+    cursor_period_end = models.DateTimeField(null=True, blank=True)
+    cursor_id = models.BigIntegerField(default=0)
+    renewed = models.PositiveIntegerField(default=0)
+    expired = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    charged = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Billing run #{self.pk} - {self.status}"
+
+
 
 class LoanApplication(models.Model):
     LOAN_STATUS = [
@@ -166,9 +224,9 @@ class LoanApplication(models.Model):
     reason = models.TextField()
     
     # Supporting documents
-    identification_image = models.ImageField(upload_to='loans/identification/')
-    proof_of_income = models.ImageField(upload_to='loans/income_proof/')
-    additional_documents = models.ImageField(upload_to='loans/additional/', blank=True, null=True)
+    identification_image = models.ImageField(upload_to='loans/identification/', storage=blobstore.get_storage)
+    proof_of_income = models.ImageField(upload_to='loans/income_proof/', storage=blobstore.get_storage)
+    additional_documents = models.ImageField(upload_to='loans/additional/', blank=True, null=True, storage=blobstore.get_storage)
     
     status = models.CharField(max_length=20, choices=LOAN_STATUS, default='pending')
     application_date = models.DateTimeField(auto_now_add=True)
@@ -208,9 +266,9 @@ class GrantApplication(models.Model):
     project_description = models.TextField(blank=True)
     
     # Supporting documents
-    identification_image = models.ImageField(upload_to='grants/identification/')
-    proposal_document = models.ImageField(upload_to='grants/proposals/')
-    additional_documents = models.ImageField(upload_to='grants/additional/', blank=True, null=True)
+    identification_image = models.ImageField(upload_to='grants/identification/', storage=blobstore.get_storage)
+    proposal_document = models.ImageField(upload_to='grants/proposals/', storage=blobstore.get_storage)
+    additional_documents = models.ImageField(upload_to='grants/additional/', blank=True, null=True, storage=blobstore.get_storage)
     
     status = models.CharField(max_length=20, choices=GRANT_STATUS, default='pending')
     application_date = models.DateTimeField(auto_now_add=True)
@@ -239,7 +297,7 @@ class PaymentRequest(models.Model):
     payment_type = models.CharField(max_length=20, choices=PAYMENT_TYPES)
     reason = models.TextField()
     amount = models.DecimalField(max_digits=12, decimal_places=2)
-    payment_screenshot = models.ImageField(upload_to='payment_screenshots/')
+    payment_screenshot = models.ImageField(upload_to='payment_screenshots/', storage=blobstore.get_storage)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -249,3 +307,165 @@ class PaymentRequest(models.Model):
 
 
 
+
+
+#LEDGER
+
+LEDGER_ENTRY_TYPE = (
+    ("transfer", "Transfer"),
+    ("settlement", "Request Settlement"),
+    ("card_funding", "Card Funding"),
+    ("card_withdrawal", "Card Withdrawal"),
+    ("debt_payment", "Debt Payment"),
+    ("subscription", "Subscription Renewal"),
+)
+
+LEDGER_DIRECTION = (
+    ("debit", "Debit"),
+    ("credit", "Credit"),
+)
+
+class LedgerEntry(models.Model):
+    """
+    One leg of a balanced journal. Rows are only ever inserted.
+
+    Customer accounts are liabilities, so a credit increases their balance
+    and a debit decreases it.
+    """
+    journal_id = models.CharField(max_length=32, db_index=True)
+    entry_type = models.CharField(choices=LEDGER_ENTRY_TYPE, max_length=30)
+
+    # Always set, so history survives if the account row is ever removed
+    ledger_account = models.CharField(max_length=100)
+    account = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_entries")
+    transaction = models.ForeignKey(Transaction, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_entries")
+
+    direction = models.CharField(choices=LEDGER_DIRECTION, max_length=10)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Ledger entries"
+        indexes = [
+            models.Index(fields=["account", "id"], name="ledger_account_id_idx"),
+            models.Index(fields=["ledger_account", "id"], name="ledger_code_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.ledger_account} {self.direction} {self.amount}"
+
+
+class BalanceSnapshot(models.Model):
+    """Checkpointed balance of an account covering ledger entries up to last_entry_id"""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="balance_snapshots")
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    last_entry_id = models.BigIntegerField(default=0)
+    taken_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["account", "-last_entry_id", "-id"], name="snapshot_account_cursor_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.account} - {self.balance} @ {self.taken_at}"
+
+
+class IdempotencyKey(models.Model):
+    """Client supplied token that makes a create request safe to retry"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="idempotency_keys")
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=100)
+    # sha256 of the request fields the key was first used with
+    fingerprint = models.CharField(max_length=64, blank=True, default="")
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, null=True, blank=True, related_name="idempotency_keys")
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "scope", "key"], name="unique_idempotency_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.scope} - {self.key}"
+
+
+#ROLLUPS
+
+ROLLUP_DIRECTION = (
+    ("in", "Money In"),
+    ("out", "Money Out"),
+)
+
+class DailyAccountRollup(models.Model):
+    """Running count and total of settled money movement per account, day, direction and type"""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="daily_rollups")
+    day = models.DateField()
+    direction = models.CharField(choices=ROLLUP_DIRECTION, max_length=3)
+    transaction_type = models.CharField(choices=TRANSACTION_TYPE, max_length=100)
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["account", "day", "direction", "transaction_type"], name="unique_daily_rollup"),
+        ]
+
+    def __str__(self):
+        return f"{self.account} - {self.day} - {self.direction} {self.transaction_type}: {self.total}"
+
+
+#JOBS
+
+JOB_STATUS = (
+    ("queued", "Queued"),
+    ("running", "Processing"),
+    ("done", "Done"),
+    ("failed", "Failed"),
+)
+
+class Job(models.Model):
+    """Background work for run_workers; handler is the dotted path of a function taking payload"""
+    handler = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict)
+    result = models.JSONField(default=dict, blank=True)
+    status = models.CharField(choices=JOB_STATUS, max_length=10, default="queued")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="jobs")
+    # The row the job works on, as "app_label.model" and pk
+    target_type = models.CharField(max_length=100, blank=True)
+    target_id = models.CharField(max_length=64, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after", "id"], name="job_runnable_idx"),
+            models.Index(fields=["target_type", "target_id"], name="job_target_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.handler} #{self.pk} - {self.status}"
+
+
+#BLOBS
+
+class StoredBlob(models.Model):
+    """One stored copy of some file content, shared by every file field holding those bytes"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    # Hash of the raw upload these bytes were normalized from, so a repeat upload can skip processing
+    source_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
@@ -0,0 +1,54 @@
+import base64
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def page_size():
+    return getattr(settings, "TRANSACTION_PAGE_SIZE", 20)
+
+
+def encode_cursor(date, pk):
+    """Opaque cursor pointing just after the row with this (date, id)"""
+    raw = f"{date.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (date, id) from a cursor, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date, pk = raw.rsplit("|", 1)
+        date = parse_datetime(date)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if date is None:
+        return None
+    return date, pk
+
+
+def keyset_page(queryset, cursor=None, size=None):
+    """
+    One page of queryset ordered newest first on (date, id).
+
+    Seeks straight past the cursor instead of using OFFSET, so every page
+    costs the same no matter how deep into the history it is. Returns the
+    rows and the cursor for the next page (None on the last page).
+    """
+    size = size or page_size()
+    queryset = queryset.order_by("-date", "-id")
+
+    position = decode_cursor(cursor)
+    if position:
+        date, pk = position
+        queryset = queryset.filter(Q(date__lt=date) | Q(date=date, id__lt=pk))
+
+    rows = list(queryset[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+
+    rows = rows[:size]
+    return rows, encode_cursor(rows[-1].date, rows[-1].pk)
@@ -1,60 +1,34 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from core_apps.account.models import Account, KYC
+from core_apps.account import directory
+from core_apps.account.context import kyc_required
+from core_apps.account.models import Account
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
 from django.contrib import messages
 from decimal import Decimal, InvalidOperation
 from core_apps.core.forms import PaymentRequestForm
 from core_apps.core.models import PaymentRequest, Transaction
+from core_apps.core import balance, idempotency, jobs, uploads
 from django.core.exceptions import ObjectDoesNotExist
 
-def get_user_kyc(user):
-    """Helper function to get KYC or return None"""
-    try:
-        return KYC.objects.get(user=user)
-    except KYC.DoesNotExist:
-        return None
-
-def get_user_account(user):
-    """Helper function to get user account"""
-    try:
-        return Account.objects.get(user=user)
-    except Account.DoesNotExist:
-        return None
-
-def kyc_required(view_func):
-    """Decorator to check if user has completed KYC"""
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            messages.warning(request, "You need to login to access this page.")
-            return redirect("core_apps.userauths:sign-in")
-        
-        kyc = get_user_kyc(request.user)
-        if not kyc:
-            messages.warning(request, "You need to complete your KYC registration to access this page.")
-            return redirect("core_apps.account:kyc-reg")
-        
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
 @login_required
 @kyc_required
 def SearchUsersRequest(request):
     """Search user by account number or id"""
     try:
-        kyc = get_user_kyc(request.user)
-        accounts = Account.objects.all()
-        query = request.POST.get("account_number", "").strip()
-
-        if query:
-            accounts = accounts.filter(
-                Q(account_number=query) |
-                Q(account_id=query)
-            ).distinct()
-        
+        kyc = request.user_context.kyc
+        query = (request.GET.get("account_number") or request.POST.get("account_number", "")).strip()
+        try:
+            page = int(request.GET.get("page", 1))
+        except ValueError:
+            page = 1
+
+        results, has_next = directory.search(query, exclude_user=request.user, page=page)
+
         context = {
-            "accounts": accounts,  # Changed to plural for clarity
+            "results": results,
             "query": query,
+            "page": page,
+            "has_next": has_next,
             "kyc": kyc,
         }
         return render(request, "payment_request/search-users.html", context)
@@ -69,7 +43,7 @@ def SearchUsersRequest(request):
 def AmountRequest(request, account_number):
     """Display amount request page for a specific account"""
     try:
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         account = get_object_or_404(Account, account_number=account_number)
         
         # Prevent self-request
@@ -80,6 +54,7 @@ def AmountRequest(request, account_number):
         context = {
             "account": account,
             "kyc": kyc,
+            "idempotency_key": idempotency.new_key(),
         }
         return render(request, "payment_request/amount-request.html", context)
     
@@ -128,16 +103,22 @@ def AmountRequestProcess(request, account_number):
                 return redirect("core_apps.core:amount-request", account_number)
 
             # Create payment request transaction
-            new_request = Transaction.objects.create(
-                user=request.user,
-                amount=amount,
-                description=description,
-                sender=sender,
-                receiver=receiver,
-                sender_account=sender_account,
-                receiver_account=receiver_account,
-                status="request_processing",
-                transaction_type="request",
+            new_request, _ = idempotency.create_once(
+                request.user,
+                "payment_request",
+                idempotency.get_key(request),
+                lambda: Transaction.objects.create(
+                    user=request.user,
+                    amount=amount,
+                    description=description,
+                    sender=sender,
+                    receiver=receiver,
+                    sender_account=sender_account,
+                    receiver_account=receiver_account,
+                    status="request_processing",
+                    transaction_type="request",
+                ),
+                idempotency.fingerprint(receiver_account.pk, amount, description),
             )
             
             transaction_id = new_request.transaction_id
@@ -150,6 +131,10 @@ def AmountRequestProcess(request, account_number):
         messages.warning(request, "Account does not exist.")
         return redirect("core_apps.core:search-users-request")
     
+    except idempotency.KeyReused as e:
+        messages.warning(request, f"{e} Please check the request and send it again.")
+        return redirect("core_apps.core:amount-request", account_number)
+
     except Exception as e:
         messages.error(request, "An error occurred while processing your request.")
         print(f"Amount request process error: {e}")
@@ -168,7 +153,7 @@ def AmountRequestConfirmation(request, account_number, transaction_id):
             messages.warning(request, "Invalid transaction.")
             return redirect("core_apps.account:dashboard")
 
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         context = {
             "account": account,
@@ -244,7 +229,7 @@ def RequestCompleted(request, account_number, transaction_id):
             messages.warning(request, "Invalid request status.")
             return redirect("core_apps.account:dashboard")
 
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         context = {
             "account": account,
@@ -279,7 +264,7 @@ def settlement_confirmation(request, account_number, transaction_id):
             messages.warning(request, "This request cannot be settled.")
             return redirect("core_apps.account:dashboard")
 
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         context = {
             "account": account,
@@ -325,20 +310,15 @@ def settlement_processing(request, account_number, transaction_id):
                 return redirect("core_apps.core:settlement-confirmation", account_number, transaction_id)
 
             if pin_number == sender_account.pin_number:
-                # Check sufficient funds
-                if sender_account.account_balance < transaction.amount:
+                # Process settlement
+                try:
+                    balance.settle_transaction(transaction, sender_account, account, "request_sent", "request_settled")
+                except balance.InsufficientFunds:
                     messages.warning(request, "Insufficient funds. Please fund your account and try again.")
                     return redirect("core_apps.core:settlement-confirmation", account_number, transaction_id)
-                
-                # Process settlement
-                sender_account.account_balance -= transaction.amount
-                sender_account.save()
-
-                account.account_balance += transaction.amount
-                account.save()
-
-                transaction.status = "request_settled"
-                transaction.save()
+                except balance.TransactionAlreadyProcessed:
+                    messages.warning(request, "This request cannot be settled.")
+                    return redirect("core_apps.account:dashboard")
 
                 messages.success(request, f"Payment to {account.user.kyc.full_name} was successful.")
                 return redirect("core_apps.core:settlement-completed", account.account_number, transaction.transaction_id)
@@ -371,7 +351,7 @@ def SettlementCompleted(request, account_number, transaction_id):
             messages.warning(request, "Settlement not completed.")
             return redirect("core_apps.account:dashboard")
 
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         context = {
             "account": account,
@@ -421,15 +401,20 @@ def DeletePaymentRequest(request, account_number, transaction_id):
 def payment_request_dashboard(request):
     """Main payment request dashboard"""
     try:
-        kyc = get_user_kyc(request.user)
-        account = get_user_account(request.user)
+        kyc = request.user_context.kyc
+        account = request.user_context.account
         
         if not account:
             messages.error(request, "Account not found.")
             return redirect("core_apps.account:dashboard")
         
         # Get user's payment requests
-        payment_requests = PaymentRequest.objects.filter(user=request.user).order_by('-created_at')
+        payment_requests = list(PaymentRequest.objects.filter(user=request.user).order_by('-created_at'))
+
+        # Latest screenshot processing job of each request
+        upload_jobs = jobs.latest_for(payment_requests)
+        for payment_request in payment_requests:
+            payment_request.upload_job = upload_jobs.get(jobs.target_key(payment_request))
         
         context = {
             'kyc': kyc,
@@ -449,11 +434,12 @@ def create_payment_request(request):
     """Create new payment request"""
     try:
         if request.method == 'POST':
-            form = PaymentRequestForm(request.POST, request.FILES)
+            form = PaymentRequestForm(request.POST, request.FILES, uploader=request.user)
             if form.is_valid():
                 payment_request = form.save(commit=False)
                 payment_request.user = request.user
                 payment_request.save()
+                uploads.enqueue(form, payment_request, request.user)
                 
                 messages.success(request, 'Payment request submitted successfully!')
                 return redirect('core_apps.core:payment-request-dashboard')
@@ -462,8 +448,8 @@ def create_payment_request(request):
         else:
             form = PaymentRequestForm()
         
-        kyc = get_user_kyc(request.user)
-        account = get_user_account(request.user)
+        kyc = request.user_context.kyc
+        account = request.user_context.account
         
         if not account:
             messages.error(request, "Account not found.")
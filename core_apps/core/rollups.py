@@ -0,0 +1,178 @@
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from core_apps.core.models import DailyAccountRollup, Transaction
+
+ZERO = Decimal("0.00")
+
+# Transaction type -> status it has once the money has actually moved
+SETTLED_STATUS = {
+    "transfer": "completed",
+    "request": "request_settled",
+    "debt_payment": "completed",
+    "subscription": "completed",
+}
+
+# Money that only leaves the customer's account, with no SaroPay account on the other side
+DEBIT_ONLY_TYPES = ("debt_payment", "subscription")
+
+
+def add(movements):
+    """
+    Fold (account_id, day, direction, transaction_type, amount) movements into the rollup.
+
+    Movements are summed in memory first, then every touched rollup row is
+    locked, bumped and written back with one bulk_update, and missing rows
+    are bulk created. Cost depends on how many distinct rows change, not on
+    how many movements there are.
+    """
+    totals = defaultdict(lambda: [0, ZERO])
+    for account_id, day, direction, transaction_type, amount in movements:
+        totals[(account_id, day, direction, transaction_type)][0] += 1
+        totals[(account_id, day, direction, transaction_type)][1] += amount
+    if not totals:
+        return
+
+    # A concurrent first write for the same day can beat us to the insert;
+    # the second attempt then finds and updates its row instead
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                _apply(totals)
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def _apply(totals):
+    rows = DailyAccountRollup.objects.select_for_update().filter(
+        account_id__in={key[0] for key in totals},
+        day__in={key[1] for key in totals},
+    ).order_by("pk")
+
+    changed = []
+    for row in rows:
+        key = (row.account_id, row.day, row.direction, row.transaction_type)
+        if key in totals:
+            count, total = totals[key]
+            row.count += count
+            row.total += total
+            changed.append(row)
+    DailyAccountRollup.objects.bulk_update(changed, ["count", "total"])
+
+    seen = {(row.account_id, row.day, row.direction, row.transaction_type) for row in changed}
+    DailyAccountRollup.objects.bulk_create([
+        DailyAccountRollup(
+            account_id=account_id,
+            day=day,
+            direction=direction,
+            transaction_type=transaction_type,
+            count=count,
+            total=total,
+        )
+        for (account_id, day, direction, transaction_type), (count, total) in totals.items()
+        if (account_id, day, direction, transaction_type) not in seen
+    ])
+
+
+def transfer_movements(transaction_type, sender_account_id, receiver_account_id, amount, day=None):
+    """The out and in legs of money moving from sender to receiver"""
+    day = day or timezone.localdate()
+    return [
+        (sender_account_id, day, "out", transaction_type, amount),
+        (receiver_account_id, day, "in", transaction_type, amount),
+    ]
+
+
+def record_transfer(txn, sender_account, receiver_account, amount):
+    add(transfer_movements(txn.transaction_type, sender_account.pk, receiver_account.pk, amount))
+
+
+def settled_transactions():
+    settled = Q()
+    for transaction_type, status in SETTLED_STATUS.items():
+        settled |= Q(transaction_type=transaction_type, status=status)
+    return Transaction.objects.filter(settled)
+
+
+def rebuild(chunk_size=2000, since=None):
+    """
+    Recompute the rollup from settled transactions, in pk-ordered chunks.
+
+    Only days from since onwards are rebuilt when it is given. Transfers that
+    settle while the rebuild runs are left to the live path, which is why the
+    scan stops at the cutoff. The cutoff is taken after the delete, in the
+    same transaction, so a live add() that lands between the two is rebuilt
+    rather than lost.
+    """
+    stale = DailyAccountRollup.objects.all()
+    if since:
+        stale = stale.filter(day__gte=since)
+    with transaction.atomic():
+        stale.delete()
+        cutoff = timezone.now()
+
+    queryset = settled_transactions().filter(
+        Q(updated__lte=cutoff) | Q(updated__isnull=True, date__lte=cutoff)
+    )
+    if since:
+        start = timezone.make_aware(datetime.combine(since, time.min))
+        queryset = queryset.filter(Q(updated__gte=start) | Q(updated__isnull=True, date__gte=start))
+
+    last_pk = 0
+    processed = 0
+    while True:
+        chunk = list(
+            queryset.filter(pk__gt=last_pk).order_by("pk").values_list(
+                "pk", "transaction_type", "amount", "sender_account_id", "receiver_account_id", "updated", "date",
+            )[:chunk_size]
+        )
+        if not chunk:
+            return processed
+
+        movements = []
+        for pk, transaction_type, amount, sender_account_id, receiver_account_id, updated, date in chunk:
+            day = timezone.localdate(updated or date)
+            if transaction_type in DEBIT_ONLY_TYPES and sender_account_id is not None:
+                movements.append((sender_account_id, day, "out", transaction_type, amount))
+                continue
+            if sender_account_id is None or receiver_account_id is None:
+                continue
+            # Settling a request moves money from the receiver back to the requester
+            if transaction_type == "request":
+                sender_account_id, receiver_account_id = receiver_account_id, sender_account_id
+            movements.extend(transfer_movements(transaction_type, sender_account_id, receiver_account_id, amount, day))
+        add(movements)
+
+        last_pk = chunk[-1][0]
+        processed += len(chunk)
+
+
+def month_summary(account, today=None):
+    """Count and total of money in and out of account since the 1st of this month"""
+    today = today or timezone.localdate()
+    summary = {direction: {"count": 0, "total": ZERO} for direction in ("in", "out")}
+    rows = DailyAccountRollup.objects.filter(
+        account=account,
+        day__gte=today.replace(day=1),
+        day__lte=today,
+    ).values("direction").annotate(count=Sum("count"), total=Sum("total"))
+    for row in rows:
+        summary[row["direction"]] = {"count": row["count"], "total": row["total"]}
+    return summary
+
+
+def daily_totals(account, start, end):
+    """Per-day totals for charts: [(day, direction, count, total)], one row per day and direction"""
+    return list(
+        DailyAccountRollup.objects.filter(account=account, day__gte=start, day__lte=end)
+        .values("day", "direction")
+        .annotate(count=Sum("count"), total=Sum("total"))
+        .order_by("day", "direction")
+        .values_list("day", "direction", "count", "total")
+    )
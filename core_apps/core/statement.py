@@ -0,0 +1,158 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core_apps.account.context import kyc_required
+from core_apps.account.models import KYC, Account
+from core_apps.core.batch_transfer import Echo
+from core_apps.core.rollups import settled_transactions
+
+STATEMENT_FIELDS = [
+    "transaction_id", "date", "type", "status", "direction", "amount",
+    "counterparty", "counterparty_account", "description",
+]
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+}
+
+
+def chunk_size():
+    return getattr(settings, "STATEMENT_CHUNK_SIZE", 2000)
+
+
+def parse_range(start, end):
+    """
+    Turn inclusive YYYY-MM-DD bounds into aware datetimes [start, end).
+
+    Either bound may be missing. Raises ValueError on a malformed date.
+    """
+    bounds = []
+    for value, shift in ((start, 0), (end, 1)):
+        if not value:
+            bounds.append(None)
+            continue
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        bounds.append(timezone.make_aware(datetime.combine(day + timedelta(days=shift), time.min)))
+    return bounds
+
+
+def statement_queryset(user, start=None, end=None):
+    """
+    Every settled transaction the user is on either side of, oldest first.
+
+    Sent requests, drafts and failures moved no money, so they are left out.
+    """
+    queryset = settled_transactions().filter(Q(sender=user) | Q(receiver=user))
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lt=end)
+    return queryset.order_by("date", "id").values_list(
+        "transaction_id", "date", "transaction_type", "status", "amount",
+        "description", "sender_id", "receiver_id",
+    )
+
+
+def counterparties(user_ids):
+    """user_id -> (full name, account number) for one chunk, in two queries"""
+    names = dict(KYC.objects.filter(user_id__in=user_ids).values_list("user_id", "full_name"))
+    numbers = dict(Account.objects.filter(user_id__in=user_ids).values_list("user_id", "account_number"))
+    return {user_id: (names.get(user_id, ""), numbers.get(user_id, "")) for user_id in user_ids}
+
+
+def statement_rows(user, start=None, end=None):
+    """
+    Yield statement rows as dicts, one server-side chunk at a time.
+
+    Only one chunk of transactions and its counterparties is held in memory
+    at once, so the cost stays flat however long the history is.
+    """
+    size = chunk_size()
+    rows = statement_queryset(user, start, end).iterator(chunk_size=size)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+
+        other_ids = {receiver_id if sender_id == user.pk else sender_id for *_, sender_id, receiver_id in chunk}
+        other_ids.discard(None)
+        others = counterparties(other_ids)
+
+        for transaction_id, date, transaction_type, status, amount, description, sender_id, receiver_id in chunk:
+            is_sender = sender_id == user.pk
+            # Settling a request moves money from the receiver back to the requester
+            outgoing = is_sender != (transaction_type == "request")
+            name, number = others.get(receiver_id if is_sender else sender_id, ("", ""))
+            yield {
+                "transaction_id": transaction_id,
+                "date": date.isoformat(),
+                "type": transaction_type,
+                "status": status,
+                "direction": "debit" if outgoing else "credit",
+                "amount": str(amount),
+                "counterparty": name,
+                "counterparty_account": number,
+                "description": description or "",
+            }
+
+
+def stream_csv(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=STATEMENT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+@login_required
+@kyc_required
+def statement_export(request):
+    """Download the transaction history as CSV or JSON Lines"""
+    fmt = request.GET.get("format", "csv")
+    if fmt not in FORMATS:
+        messages.warning(request, "Unsupported statement format.")
+        return redirect("core_apps.core:transactions")
+
+    try:
+        start, end = parse_range(request.GET.get("start"), request.GET.get("end"))
+    except ValueError as e:
+        messages.warning(request, str(e))
+        return redirect("core_apps.core:transactions")
+
+    user = request.user
+    account_number = request.GET.get("account")
+    if account_number:
+        # Back office can pull any customer's statement
+        if not request.user.is_staff:
+            messages.warning(request, "Access denied. Admin privileges required.")
+            return redirect("core_apps.core:transactions")
+        account = Account.objects.filter(account_number=account_number).select_related("user").first()
+        if account is None:
+            messages.warning(request, "Account does not exist.")
+            return redirect("core_apps.core:transactions")
+        user = account.user
+
+    content_type, extension = FORMATS[fmt]
+    rows = statement_rows(user, start, end)
+    stream = stream_csv(rows) if fmt == "csv" else stream_jsonl(rows)
+
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="statement-{user.account.account_number}.{extension}"'
+    return response
@@ -4,49 +4,21 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.core.exceptions import ObjectDoesNotExist
-from core_apps.account.models import KYC
+from core_apps.account.context import kyc_required
+from core_apps.core import entitlements
 from core_apps.core.models import SubscriptionPlan, UserSubscription
 
-def get_user_kyc(user):
-    """Helper function to get KYC or return None"""
-    try:
-        return KYC.objects.get(user=user)
-    except KYC.DoesNotExist:
-        return None
-
-def kyc_required(view_func):
-    """Decorator to check if user has completed KYC"""
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            messages.warning(request, "You need to login to access this page.")
-            return redirect("core_apps.userauths:sign-in")
-        
-        kyc = get_user_kyc(request.user)
-        if not kyc:
-            messages.warning(request, "You need to complete your KYC registration to access this page.")
-            return redirect("core_apps.account:kyc-reg")
-        
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
 @login_required
 @kyc_required
 def subscription_plans(request):
     """View to display all subscription plans"""
     try:
-        plans = SubscriptionPlan.objects.filter(is_active=True).order_by('price')
-        kyc = get_user_kyc(request.user)
-        
-        # Get user's current subscription if logged in
-        current_subscription = None
-        try:
-            current_subscription = UserSubscription.objects.get(user=request.user)
-        except UserSubscription.DoesNotExist:
-            pass
+        plans = entitlements.active_plans()
+        kyc = request.user_context.kyc
         
         context = {
             'plans': plans,
-            'current_subscription': current_subscription,
+            'entitlements': request.user_context.entitlements,
             "kyc": kyc,
         }
         return render(request, 'subscription/plans.html', context)
@@ -177,7 +149,7 @@ def subscription_details(request):
     """View to display current subscription details"""
     try:
         subscription = UserSubscription.objects.get(user=request.user)
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         context = {
             'subscription': subscription,
@@ -1,3 +1,277 @@
-# from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from core_apps.account.models import Account, Debt
+from core_apps.core import autodebit, balance, batch_transfer, billing, drafts, idempotency, ledger, rollups
+from core_apps.core.models import (
+    DRAFT_STATUSES, CreditCard, DailyAccountRollup, SubscriptionPlan, Transaction, UserSubscription,
+)
+from core_apps.core.transaction import tab_queryset
+from core_apps.userauths.models import User
+
+
+class TransactionIndexTests(TestCase):
+    """EXPLAIN the hot Transaction queries and check each one goes through its index"""
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # Test tables are tiny, so a seq scan is always cheapest; ask what would happen at scale
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"{index_name} not used:\n{plan}")
+
+    def test_history_tabs(self):
+        user = User(pk=0)
+        expected = {
+            "sent": "txn_sender_type_date_idx",
+            "received": "txn_recv_transfer_date_idx",
+            "sent-requests": "txn_sender_type_date_idx",
+            "received-requests": "txn_recv_request_date_idx",
+        }
+        for tab, index_name in expected.items():
+            with self.subTest(tab=tab):
+                self.assertUsesIndex(tab_queryset(user, tab).order_by("-date", "-id")[:21], index_name)
+
+    def test_draft_sweeper(self):
+        cutoff = timezone.now() - timedelta(hours=1)
+        for status in DRAFT_STATUSES:
+            with self.subTest(status=status):
+                self.assertUsesIndex(drafts.stale_drafts(status, cutoff), "txn_status_date_idx")
+
+    def test_transfer_confirmation(self):
+        plan = Transaction.objects.filter(transaction_id="TRN0", user=User(pk=0)).explain()
+        self.assertNotIn("SCAN core_transaction\n", plan + "\n")
+        self.assertNotIn("Seq Scan on core_transaction", plan)
+        self.assertIn("transaction_id", plan)
+
+
+def make_customer(username, balance="0.00"):
+    """User with the Account and Debt the signals create, holding balance"""
+    user = User.objects.create_user(username=username, email=f"{username}@example.com", password="secret")
+    Account.objects.filter(user=user).update(account_balance=Decimal(balance))
+    return user, Account.objects.get(user=user)
+
+
+def make_transfer(sender, sender_account, receiver_account, amount):
+    return Transaction.objects.create(
+        user=sender, sender=sender, receiver=receiver_account.user, sender_account=sender_account,
+        receiver_account=receiver_account, amount=Decimal(amount), status="processing", transaction_type="transfer",
+    )
+
+
+class BalanceTests(TestCase):
+    def setUp(self):
+        self.user, self.account = make_customer("sender", "100.00")
+        _, self.receiver = make_customer("receiver", "5.00")
+
+    def assertBalances(self, sender, receiver):
+        self.account.refresh_from_db()
+        self.receiver.refresh_from_db()
+        self.assertEqual((self.account.account_balance, self.receiver.account_balance), (Decimal(sender), Decimal(receiver)))
+
+    def test_settle_transaction_moves_money_once(self):
+        txn = make_transfer(self.user, self.account, self.receiver, "40.00")
+
+        balance.settle_transaction(txn, self.account, self.receiver, "processing", "completed")
+        with self.assertRaises(balance.TransactionAlreadyProcessed):
+            balance.settle_transaction(txn, self.account, self.receiver, "processing", "completed")
+
+        self.assertBalances("60.00", "45.00")
+        txn.refresh_from_db()
+        self.assertEqual(txn.status, "completed")
+        rollup = DailyAccountRollup.objects.get(account=self.receiver, direction="in")
+        self.assertEqual((rollup.count, rollup.total), (1, Decimal("40.00")))
+
+    def test_insufficient_funds_changes_nothing(self):
+        txn = make_transfer(self.user, self.account, self.receiver, "100.01")
+
+        with self.assertRaises(balance.InsufficientFunds):
+            balance.settle_transaction(txn, self.account, self.receiver, "processing", "completed")
+
+        self.assertBalances("100.00", "5.00")
+        txn.refresh_from_db()
+        self.assertEqual(txn.status, "processing")
+        self.assertFalse(txn.ledger_entries.exists())
+
+    def test_card_funding_round_trip(self):
+        card = CreditCard.objects.create(user=self.user, name="Sender", number="4000", month=1, year=2030, cvv=123)
+
+        balance.fund_card(self.account, card, "30.00")
+        balance.withdraw_from_card(self.account, card, "10.00")
+
+        card.refresh_from_db()
+        self.assertEqual(card.amount, Decimal("20.00"))
+        self.assertBalances("80.00", "5.00")
+        with self.assertRaises(balance.InsufficientFunds):
+            balance.fund_card(self.account, card, "80.01")
+
+
+class LedgerTests(TestCase):
+    def test_every_money_path_reconciles(self):
+        user, account = make_customer("owner", "1000.00")
+        other_user, other = make_customer("other", "50.00")
+        ledger.take_snapshots(opening=True)
+
+        txn = make_transfer(user, account, other, "100.00")
+        balance.settle_transaction(txn, account, other, "processing", "completed")
+        batch_transfer.run_batch(user, account, [{"account_number": other.account_number, "amount": "25", "description": ""}])
+        plan = SubscriptionPlan.objects.create(name="Basic", plan_type="BASIC", price=Decimal("9.99"))
+        UserSubscription.objects.create(user=other_user, plan=plan, is_active=True, current_period_end=timezone.now())
+        billing.run_cycle(billing.start_run("balance"))
+        debt = Debt.objects.get(account=account)
+        debt.total_amount = debt.remaining_amount = Decimal("120.00")
+        debt.due_date = timezone.localdate() + relativedelta(months=6)
+        debt.save()
+        debited, collected = autodebit.run()
+
+        self.assertEqual(list(ledger.reconcile()), [])
+        self.assertEqual(debited, 1)
+        account.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(account.account_balance, Decimal("875.00") - collected)
+        self.assertEqual(other.account_balance, Decimal("165.01"))
+        self.assertEqual(ledger.balance_as_of(account), account.account_balance)
+
+    def test_reconcile_reports_balances_changed_outside_the_ledger(self):
+        _, account = make_customer("tampered", "10.00")
+        ledger.take_snapshots(opening=True)
+
+        Account.objects.filter(pk=account.pk).update(account_balance=Decimal("15.00"))
+
+        self.assertEqual(list(ledger.reconcile()), [(account.pk, Decimal("15.00"), Decimal("10.00"))])
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user, self.account = make_customer("retrier", "100.00")
+        _, self.receiver = make_customer("target")
+        self.calls = 0
+
+    def create(self):
+        self.calls += 1
+        return make_transfer(self.user, self.account, self.receiver, "10.00")
+
+    def test_retry_replays_the_first_transaction(self):
+        key = idempotency.new_key()
+        first, created = idempotency.create_once(self.user, "transfer", key, self.create, "fp")
+        again, created_again = idempotency.create_once(self.user, "transfer", key, self.create, "fp")
+
+        self.assertEqual((created, created_again), (True, False))
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(self.calls, 1)
+
+    def test_changed_request_cannot_reuse_a_key(self):
+        key = idempotency.new_key()
+        idempotency.create_once(self.user, "transfer", key, self.create, "fp")
+
+        with self.assertRaises(idempotency.KeyReused):
+            idempotency.create_once(self.user, "transfer", key, self.create, "other")
+        self.assertEqual(Transaction.objects.count(), 1)
+
+
+class BatchTransferTests(TestCase):
+    def setUp(self):
+        self.user, self.account = make_customer("payer", "100.00")
+        _, self.receiver = make_customer("payee")
+
+    def row(self, amount):
+        return {"account_number": self.receiver.account_number, "amount": amount, "description": ""}
+
+    def test_non_finite_amounts_are_rejected_per_row(self):
+        results = batch_transfer.run_batch(self.user, self.account, [self.row("NaN"), self.row("Infinity"), self.row("10")])
+
+        self.assertEqual([result["status"] for result in results], ["rejected", "rejected", "completed"])
+        self.assertEqual(results[0]["detail"], "Invalid amount format.")
+        self.receiver.refresh_from_db()
+        self.assertEqual(self.receiver.account_balance, Decimal("10.00"))
+
+    def test_batch_larger_than_balance_fails_as_a_whole(self):
+        results = batch_transfer.run_batch(self.user, self.account, [self.row("60"), self.row("50")])
+
+        self.assertEqual([result["status"] for result in results], ["failed", "failed"])
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.account_balance, Decimal("100.00"))
+        self.assertFalse(Transaction.objects.exists())
+
+
+class BillingTests(TestCase):
+    def setUp(self):
+        self.plan = SubscriptionPlan.objects.create(name="Gold", plan_type="GOLD", price=Decimal("15.00"))
+        self.period_end = timezone.now() - timedelta(hours=1)
+
+    def subscribe(self, user):
+        return UserSubscription.objects.create(
+            user=user, plan=self.plan, is_active=True,
+            current_period_start=self.period_end - timedelta(days=30), current_period_end=self.period_end,
+        )
+
+    def test_balance_renewal_is_recorded_as_a_transaction(self):
+        user, account = make_customer("subscriber", "20.00")
+        subscription = self.subscribe(user)
+
+        run = billing.run_cycle(billing.start_run("balance"))
+
+        self.assertEqual((run.renewed, run.failed, run.charged), (1, 0, Decimal("15.00")))
+        account.refresh_from_db()
+        self.assertEqual(account.account_balance, Decimal("5.00"))
+        subscription.refresh_from_db()
+        self.assertGreater(subscription.current_period_end, self.period_end)
+        txn = Transaction.objects.get(transaction_type="subscription")
+        self.assertEqual((txn.sender_account_id, txn.amount, txn.status), (account.pk, Decimal("15.00"), "completed"))
+        self.assertEqual(txn.ledger_entries.count(), 2)
+        rollup = DailyAccountRollup.objects.get(account=account, transaction_type="subscription")
+        self.assertEqual((rollup.direction, rollup.count, rollup.total), ("out", 1, Decimal("15.00")))
+
+        rollups.rebuild()
+        rebuilt = DailyAccountRollup.objects.get(account=account, transaction_type="subscription")
+        self.assertEqual((rebuilt.direction, rebuilt.count, rebuilt.total), ("out", 1, Decimal("15.00")))
+
+    def test_insufficient_balance_ends_the_subscription(self):
+        user, account = make_customer("broke", "10.00")
+        subscription = self.subscribe(user)
+
+        run = billing.run_cycle(billing.start_run("balance"))
+
+        self.assertEqual((run.renewed, run.failed), (0, 1))
+        subscription.refresh_from_db()
+        self.assertFalse(subscription.is_active)
+        account.refresh_from_db()
+        self.assertEqual(account.account_balance, Decimal("10.00"))
+        self.assertFalse(Transaction.objects.filter(transaction_type="subscription").exists())
+
+
+class AutodebitTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.user, self.account = make_customer("debtor", "1000.00")
+        self.debt = Debt.objects.get(account=self.account)
+
+    def fund(self, amount, due_date):
+        self.debt.total_amount = self.debt.remaining_amount = Decimal(amount)
+        self.debt.due_date = due_date
+        self.debt.save()
+
+    def test_overdue_installment_follows_the_term_from_funding(self):
+        due_date = self.today - timedelta(days=5)
+        self.fund("1200.00", due_date)
+        # Opened a year before it was funded for a four-installment term
+        Debt.objects.filter(pk=self.debt.pk).update(
+            created_at=timezone.now() - timedelta(days=500), funded_on=due_date - relativedelta(months=3),
+        )
+
+        self.assertEqual(autodebit.run(today=self.today), (1, Decimal("300.00")))
+        self.debt.refresh_from_db()
+        self.assertEqual((self.debt.remaining_amount, self.debt.last_debited_on), (Decimal("900.00"), self.today))
+        txn = Transaction.objects.get(transaction_type="debt_payment")
+        self.assertEqual((txn.sender_account_id, txn.amount), (self.account.pk, Decimal("300.00")))
+
+        # Taken at most once a month
+        self.assertEqual(autodebit.run(today=self.today), (0, Decimal("0.00")))
@@ -1,64 +1,73 @@
+from urllib.parse import urlencode
 from django.shortcuts import render, get_object_or_404, redirect
-from core_apps.core.models import Transaction
-from core_apps.account.models import KYC
+from django.db.models import F
+from django.urls import reverse
+from core_apps.core.models import DRAFT_STATUSES, Transaction
+from core_apps.core.pagination import keyset_page
+from core_apps.account.context import kyc_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import ObjectDoesNotExist
 
-def get_user_kyc(user):
-    """Helper function to get KYC or return None"""
-    try:
-        return KYC.objects.get(user=user)
-    except KYC.DoesNotExist:
-        return None
+# Unconfirmed drafts never show up in history
+HIDDEN_STATUSES = DRAFT_STATUSES + ("expired",)
 
-def kyc_required(view_func):
-    """Decorator to check if user has completed KYC"""
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            messages.warning(request, "You need to login to access this page.")
-            return redirect("core_apps.userauths:sign-in")
-        
-        kyc = get_user_kyc(request.user)
-        if not kyc:
-            messages.warning(request, "You need to complete your KYC registration to access this page.")
-            return redirect("core_apps.account:kyc-reg")
-        
-        return view_func(request, *args, **kwargs)
-    return wrapper
+# Tab name -> (side of the transaction the user is on, transaction type)
+TABS = {
+    "sent": ("sender", "transfer"),
+    "received": ("receiver", "transfer"),
+    "sent-requests": ("sender", "request"),
+    "received-requests": ("receiver", "request"),
+}
+
+def tab_queryset(user, tab):
+    """Transactions for one history tab with counterparty details joined in"""
+    side, transaction_type = TABS[tab]
+    return Transaction.objects.filter(
+        **{side: user},
+        transaction_type=transaction_type,
+    ).exclude(status__in=HIDDEN_STATUSES).annotate(
+        sender_name=F("sender__kyc__full_name"),
+        receiver_name=F("receiver__kyc__full_name"),
+        sender_account_number=F("sender_account__account_number"),
+    )
+
+def next_page_url(tab, cursor):
+    if not cursor:
+        return None
+    return f"{reverse('core_apps.core:transactions')}?{urlencode({'tab': tab, 'cursor': cursor})}"
 
 @kyc_required
 def transaction_lists(request):
     """View to display all transactions for the user"""
     try:
-        # Get transactions
-        sender_transaction = Transaction.objects.filter(
-            sender=request.user, 
-            transaction_type="transfer"
-        ).order_by("-id")
-        
-        receiver_transaction = Transaction.objects.filter(
-            receiver=request.user, 
-            transaction_type="transfer"
-        ).order_by("-id")
+        # Infinite scroll asks for the next page of a single tab
+        tab = request.GET.get("tab")
+        if tab in TABS:
+            rows, cursor = keyset_page(tab_queryset(request.user, tab), request.GET.get("cursor"))
+            response = render(request, "transaction/transaction-rows.html", {"tab": tab, "rows": rows})
+            next_url = next_page_url(tab, cursor)
+            if next_url:
+                response["X-Next-Page"] = next_url
+            return response
 
-        request_sender_transaction = Transaction.objects.filter(
-            sender=request.user, 
-            transaction_type="request"
-        )
-        
-        request_receiver_transaction = Transaction.objects.filter(
-            receiver=request.user, 
-            transaction_type="request"
-        )
+        # First page of every tab, one query each
+        sender_transaction, sender_cursor = keyset_page(tab_queryset(request.user, "sent"))
+        receiver_transaction, receiver_cursor = keyset_page(tab_queryset(request.user, "received"))
+        request_sender_transaction, request_sender_cursor = keyset_page(tab_queryset(request.user, "sent-requests"))
+        request_receiver_transaction, request_receiver_cursor = keyset_page(tab_queryset(request.user, "received-requests"))
 
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         context = {
             "sender_transaction": sender_transaction,
             "receiver_transaction": receiver_transaction,
             "request_sender_transaction": request_sender_transaction,
             "request_receiver_transaction": request_receiver_transaction,  # Fixed typo
+            "sender_next": next_page_url("sent", sender_cursor),
+            "receiver_next": next_page_url("received", receiver_cursor),
+            "request_sender_next": next_page_url("sent-requests", request_sender_cursor),
+            "request_receiver_next": next_page_url("received-requests", request_receiver_cursor),
             "kyc": kyc,
         }
 
@@ -75,7 +84,7 @@ def transaction_detail(request, transaction_id):
     """View to display transaction details"""
     try:
         transaction = get_object_or_404(Transaction, transaction_id=transaction_id)
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         
         # Check if user is authorized to view this transaction
         if transaction.sender != request.user and transaction.receiver != request.user:
@@ -1,52 +1,33 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from core_apps.account.models import Account, KYC
+from core_apps.account import directory
+from core_apps.account.context import kyc_required
+from core_apps.account.models import Account
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
 from django.contrib import messages
 from decimal import Decimal, InvalidOperation
 from core_apps.core.models import Transaction
+from core_apps.core import balance, idempotency
 from django.core.exceptions import ObjectDoesNotExist
 
-def get_user_kyc(user):
-    """Helper function to get KYC or return None"""
-    try:
-        return KYC.objects.get(user=user)
-    except KYC.DoesNotExist:
-        return None
-
-def kyc_required(view_func):
-    """Decorator to check if user has completed KYC"""
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            messages.warning(request, "You need to login to access this page.")
-            return redirect("core_apps.userauths:sign-in")
-        
-        kyc = get_user_kyc(request.user)
-        if not kyc:
-            messages.warning(request, "You need to complete your KYC registration to access this page.")
-            return redirect("core_apps.account:kyc-reg")
-        
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
 @login_required
 @kyc_required
 def search_users_account_number(request):
     """Search for users by account number"""
     try:
-        kyc = get_user_kyc(request.user)
-        accounts = Account.objects.all()
-        query = request.POST.get("account_number", "").strip()
+        kyc = request.user_context.kyc
+        query = (request.GET.get("account_number") or request.POST.get("account_number", "")).strip()
+        try:
+            page = int(request.GET.get("page", 1))
+        except ValueError:
+            page = 1
 
-        if query:
-            accounts = accounts.filter(
-                Q(account_number=query) |
-                Q(account_id=query)
-            ).distinct()
+        results, has_next = directory.search(query, exclude_user=request.user, page=page)
 
         context = {
-            "accounts": accounts,  # Changed from "account" to "accounts" for clarity
+            "results": results,
             "query": query,
+            "page": page,
+            "has_next": has_next,
             "kyc": kyc,
         }
         return render(request, "transfer/search-user-account-number.html", context)
@@ -61,7 +42,7 @@ def search_users_account_number(request):
 def AmountTransfer(request, account_number):
     """Display amount transfer page for a specific account"""
     try:
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         account = get_object_or_404(Account, account_number=account_number)
         
         # Prevent self-transfer
@@ -72,6 +53,7 @@ def AmountTransfer(request, account_number):
         context = {
             "account": account,
             "kyc": kyc,
+            "idempotency_key": idempotency.new_key(),
         }
         return render(request, "transfer/amount-transfer.html", context)
     
@@ -118,17 +100,23 @@ def AmountTransferProcess(request, account_number):
 
             # Check if sender has sufficient funds
             if sender_account.account_balance >= amount:
-                # Create transaction record
-                new_transaction = Transaction.objects.create(
-                    user=request.user,
-                    amount=amount,
-                    description=description,
-                    receiver=receiver_account.user,
-                    sender=request.user,
-                    sender_account=sender_account,
-                    receiver_account=receiver_account,
-                    status="processing",
-                    transaction_type="transfer"
+                # Create transaction record, once per idempotency key
+                new_transaction, _ = idempotency.create_once(
+                    request.user,
+                    "transfer",
+                    idempotency.get_key(request),
+                    lambda: Transaction.objects.create(
+                        user=request.user,
+                        amount=amount,
+                        description=description,
+                        receiver=receiver_account.user,
+                        sender=request.user,
+                        sender_account=sender_account,
+                        receiver_account=receiver_account,
+                        status="processing",
+                        transaction_type="transfer"
+                    ),
+                    idempotency.fingerprint(receiver_account.pk, amount, description),
                 )
                 
                 transaction_id = new_transaction.transaction_id
@@ -144,6 +132,10 @@ def AmountTransferProcess(request, account_number):
         messages.warning(request, "Account does not exist.")
         return redirect("core_apps.core:search-account")
     
+    except idempotency.KeyReused as e:
+        messages.warning(request, f"{e} Please check the transfer and send it again.")
+        return redirect("core_apps.core:amount-transfer", account_number)
+
     except Exception as e:
         messages.error(request, "An error occurred while processing the transfer.")
         print(f"Amount transfer process error: {e}")
@@ -154,7 +146,7 @@ def AmountTransferProcess(request, account_number):
 def TransferConfirmation(request, account_number, transaction_id):
     """Display transfer confirmation page"""
     try:
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         account = get_object_or_404(Account, account_number=account_number)
         transaction = get_object_or_404(Transaction, transaction_id=transaction_id, user=request.user)
         
@@ -209,24 +201,21 @@ def TransferProcess(request, account_number, transaction_id):
             # Validate PIN number
             if pin_number == sender_account.pin_number:
                 try:
-                    # Update transaction status
-                    transaction.status = "completed"
-                    transaction.save()
-
-                    # Update account balances
-                    sender_account.account_balance -= transaction.amount
-                    sender_account.save()
-
-                    receiver_account.account_balance += transaction.amount
-                    receiver_account.save()
+                    # Status flip and both balance updates commit together
+                    balance.settle_transaction(transaction, sender_account, receiver_account, "processing", "completed")
 
                     messages.success(request, "Transfer completed successfully!")
                     return redirect("core_apps.core:transfer-completed", account_number, transaction_id)
-                
+
+                except balance.TransactionAlreadyProcessed:
+                    messages.warning(request, "This transaction has already been processed.")
+                    return redirect("core_apps.account:account")
+
+                except balance.InsufficientFunds:
+                    messages.warning(request, "Insufficient funds.")
+                    return redirect('core_apps.core:transfer-confirmation', account_number, transaction_id)
+
                 except Exception as e:
-                    # Rollback transaction status if balance update fails
-                    transaction.status = "failed"
-                    transaction.save()
                     messages.error(request, "Transfer failed due to a system error.")
                     print(f"Balance update error: {e}")
                     return redirect('core_apps.core:transfer-confirmation', account_number, transaction_id)
@@ -252,7 +241,7 @@ def TransferProcess(request, account_number, transaction_id):
 def TransferComplete(request, account_number, transaction_id):
     """Display transfer completion page"""
     try:
-        kyc = get_user_kyc(request.user)
+        kyc = request.user_context.kyc
         account = get_object_or_404(Account, account_number=account_number)
         transaction = get_object_or_404(Transaction, transaction_id=transaction_id, user=request.user)
         
@@ -0,0 +1,112 @@
+"""
+Upload handler that writes each chunk to disk as it arrives.
+
+Files are written to a temporary file, which queueing them for a worker
+(core_apps.core.uploads) moves into storage. Size and type are checked
+while the body streams in. Once a file breaks a limit, the rest of it is
+thrown away unread into memory and the form gets a RejectedUpload whose
+upload_error explains why.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+
+# Leading bytes of each accepted type: (offset, bytes) pairs that must all match
+SIGNATURES = {
+    "jpeg": [((0, b"\xff\xd8\xff"),)],
+    "png": [((0, b"\x89PNG\r\n\x1a\n"),)],
+    "gif": [((0, b"GIF87a"),), ((0, b"GIF89a"),)],
+    "webp": [((0, b"RIFF"), (8, b"WEBP"))],
+}
+IMAGE_TYPES = ("jpeg", "png", "gif", "webp")
+SNIFF_BYTES = 12
+
+# Batch transfer files are CSV or JSON text, which has no signature to check
+DEFAULT_FIELD_LIMITS = {
+    "batch_file": {"max_size": 2 * 1024 * 1024, "types": None},
+}
+
+
+def max_upload_size():
+    return getattr(settings, "UPLOAD_MAX_SIZE", 20 * 1024 * 1024)
+
+
+def limits_for(field_name):
+    """(max bytes, accepted types or None for any) for a form field"""
+    limits = getattr(settings, "UPLOAD_FIELD_LIMITS", DEFAULT_FIELD_LIMITS).get(field_name, {})
+    return limits.get("max_size", max_upload_size()), limits.get("types", IMAGE_TYPES)
+
+
+def sniff(head):
+    """Type name for a file starting with head, or None"""
+    for name, alternatives in SIGNATURES.items():
+        for checks in alternatives:
+            if all(head[offset:offset + len(magic)] == magic for offset, magic in checks):
+                return name
+    return None
+
+
+class RejectedUpload(UploadedFile):
+    """Empty stand-in for a file that broke a limit"""
+
+    def __init__(self, name, content_type, error):
+        super().__init__(BytesIO(), name, content_type, 0)
+        self.upload_error = error
+
+
+class BoundedUploadHandler(FileUploadHandler):
+    chunk_size = 64 * 1024
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.max_size, self.types = limits_for(field_name)
+        self.received = 0
+        self.head = b""
+        self.error = None
+        self.file = TemporaryUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        if self.content_length and self.content_length > self.max_size:
+            self.reject(self.too_large())
+
+    def too_large(self):
+        return f"Files may not be larger than {filesizeformat(self.max_size)}."
+
+    def reject(self, error):
+        self.error = error
+        self.file.close()
+        self.file = None
+
+    def check_type(self):
+        if self.types is not None and sniff(self.head) not in self.types:
+            self.reject("Upload a valid image. The file you uploaded was either not an image or a corrupted image.")
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error:
+            return None
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.reject(self.too_large())
+            return None
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self.check_type()
+                if self.error:
+                    return None
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.error and len(self.head) < SNIFF_BYTES:
+            self.check_type()
+        if self.error:
+            return RejectedUpload(self.file_name, self.content_type, self.error)
+        self.file.seek(0)
+        self.file.size = file_size
+        return self.file
+
+    def upload_interrupted(self):
+        if self.file is not None:
+            self.file.close()
@@ -0,0 +1,207 @@
+"""
+Uploaded images processed by workers instead of in the request.
+
+Forms using DeferredUploadsMixin take files without opening them. The view
+saves each file under spool/ in the default storage, or takes the key of a
+file the browser uploaded to storage itself, and queues process_uploads. A
+worker then validates, normalizes and checksums the files, writes them to
+media storage and sets them on the model. Only storage is shared between web
+and worker processes, so they can run on separate machines.
+"""
+import hashlib
+import os
+import uuid
+from io import BytesIO
+
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+from core_apps.account import thumbnails
+from core_apps.core import blobstore, jobs
+
+HANDLER = "core_apps.core.uploads.process_uploads"
+SPOOL_DIR = "spool"
+
+
+def max_dimension():
+    return getattr(settings, "UPLOAD_MAX_DIMENSION", 2560)
+
+
+class DeferredFileField(forms.FileField):
+    """FileField that reports files refused by BoundedUploadHandler"""
+
+    def to_python(self, data):
+        error = getattr(data, "upload_error", None)
+        if error:
+            raise forms.ValidationError(error, code="invalid")
+        return super().to_python(data)
+
+
+class DeferredUploadsMixin:
+    """
+    ModelForm mixin that accepts image fields as plain files and keeps them off the instance.
+
+    Each image field also gets a hidden <name>_key field for files the
+    browser sent straight to storage (core_apps.core.direct_uploads); pass
+    uploader= so their keys can be checked. Size and extension checks still
+    run in the form. Pass the form to enqueue() after saving the instance.
+    """
+
+    def __init__(self, *args, uploader=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.uploader = uploader
+        self.deferred_fields = []
+        self.required_uploads = set()
+        self.direct_uploads = {}
+        for name, field in list(self.fields.items()):
+            if isinstance(field, forms.ImageField):
+                field.widget.attrs.update({
+                    "data-direct-upload": reverse("core_apps.core:direct-upload-sign"),
+                    "data-direct-upload-confirm": reverse("core_apps.core:direct-upload-confirm"),
+                })
+                # Required-ness is checked in clean(), where a key can stand in for the file
+                self.fields[name] = DeferredFileField(
+                    required=False,
+                    widget=field.widget,
+                    label=field.label,
+                    help_text=field.help_text,
+                    validators=field.validators,
+                )
+                self.fields[f"{name}_key"] = forms.CharField(required=False, widget=forms.HiddenInput)
+                self.deferred_fields.append(name)
+                if field.required:
+                    self.required_uploads.add(name)
+        self.stored_files = {name: getattr(self.instance, name).name for name in self.deferred_fields}
+
+    def clean(self):
+        from core_apps.core.direct_uploads import read_token
+
+        cleaned_data = super().clean()
+        for name in self.deferred_fields:
+            if isinstance(self.cleaned_data.get(name), UploadedFile) or name in self.errors:
+                continue
+            token = self.cleaned_data.get(f"{name}_key")
+            if token:
+                data = read_token(token, self.uploader) if self.uploader else None
+                if data is None or data["field"] != name:
+                    self.add_error(name, "The upload expired, please choose the file again.")
+                else:
+                    self.direct_uploads[name] = data
+            elif name in self.required_uploads and not self.stored_files[name]:
+                self.add_error(name, self.fields[name].error_messages["required"])
+        return cleaned_data
+
+    def _post_clean(self):
+        super()._post_clean()
+        # Leave the stored files in place until a worker has processed the uploads
+        for name in self.deferred_fields:
+            setattr(self.instance, name, self.stored_files[name])
+
+    def deferred_uploads(self):
+        return {
+            name: self.cleaned_data[name]
+            for name in self.deferred_fields
+            if isinstance(self.cleaned_data.get(name), UploadedFile)
+        }
+
+
+def spool(upload):
+    """Save an upload under SPOOL_DIR in the default storage and return its key"""
+    return default_storage.save(f"{SPOOL_DIR}/{uuid.uuid4().hex}", upload)
+
+
+def enqueue(form, instance, user=None):
+    """Queue processing of the form's uploads for instance; returns the Job, or None without uploads"""
+    files = {
+        name: {"key": spool(upload), "name": upload.name}
+        for name, upload in form.deferred_uploads().items()
+    }
+    files.update({
+        name: {"key": data["key"], "name": data["name"]}
+        for name, data in form.direct_uploads.items()
+    })
+    if not files:
+        return None
+    payload = {"model": instance._meta.label_lower, "pk": str(instance.pk), "files": files}
+    return jobs.enqueue(HANDLER, payload, user=user, target=instance)
+
+
+def normalize(f):
+    """
+    Validated, upright and metadata-free copy of an image, at most max_dimension() on a side.
+
+    Returns (bytes, extension). Images with transparency stay PNG, the rest become JPEG.
+    """
+    with Image.open(f) as image:
+        image.verify()
+    f.seek(0)
+    limit = max_dimension()
+    with Image.open(f) as image:
+        image.draft("RGB", (limit, limit))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((limit, limit), Image.LANCZOS)
+        out = BytesIO()
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            image.save(out, "PNG", optimize=True)
+            return out.getvalue(), ".png"
+        image.convert("RGB").save(out, "JPEG", quality=85, optimize=True)
+        return out.getvalue(), ".jpg"
+
+
+def open_upload(spooled):
+    """The raw upload, spooled or put in storage by the browser"""
+    return default_storage.open(spooled["key"], "rb")
+
+
+def discard(payload):
+    for spooled in payload["files"].values():
+        default_storage.delete(spooled["key"])
+
+
+def process_uploads(payload):
+    model = apps.get_model(payload["model"])
+    try:
+        instance = model.objects.get(pk=payload["pk"])
+    except model.DoesNotExist:
+        discard(payload)
+        raise jobs.Rejected("The record these documents belong to no longer exists.")
+
+    checksums = {}
+    sources = {}
+    for name, spooled in payload["files"].items():
+        label = name.replace("_", " ").capitalize()
+        try:
+            with open_upload(spooled) as f:
+                source, _ = blobstore.file_hash(f)
+                blob = blobstore.find_source(source)
+                if blob is None:
+                    data, extension = normalize(f)
+        except FileNotFoundError:
+            raise jobs.Rejected(f"{label}: the upload was lost, please submit it again.")
+        except (SyntaxError, *thumbnails.IMAGE_ERRORS):
+            discard(payload)
+            raise jobs.Rejected(f"{label}: the file is not a valid image.")
+
+        if blob is not None:
+            # The same bytes were uploaded and processed before
+            setattr(instance, name, blob.name)
+            checksums[name] = {"sha256": blob.sha256, "bytes": blob.size, "reused": True}
+            continue
+        stem = os.path.splitext(os.path.basename(spooled["name"]))[0] or name
+        setattr(instance, name, ContentFile(data, name=stem + extension))
+        checksums[name] = {"sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data)}
+        sources[name] = source
+
+    instance.save(update_fields=list(payload["files"]))
+    discard(payload)
+    for name in checksums:
+        checksums[name]["name"] = getattr(instance, name).name
+        if name in sources:
+            blobstore.remember_source(checksums[name]["name"], sources[name])
+    return checksums
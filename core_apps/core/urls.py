@@ -1,5 +1,5 @@
 from django.urls import path
-from core_apps.core import funding, subscription, views, transfer, transaction, payment_request, credit_card
+from core_apps.core import batch_transfer, direct_uploads, funding, statement, subscription, views, transfer, transaction, payment_request, credit_card
 
 
 app_name = "core_apps.core"
@@ -14,10 +14,17 @@ urlpatterns = [
     path("transfer-confirmation/<account_number>/<transaction_id>/", transfer.TransferConfirmation, name="transfer-confirmation"),
     path("transfer-process/<account_number>/<transaction_id>/", transfer.TransferProcess, name="transfer-process"),
     path("transfer-completed/<account_number>/<transaction_id>/", transfer.TransferComplete, name="transfer-completed"),
+    path("batch-transfer/", batch_transfer.batch_transfer, name="batch-transfer"),
 
     # Transactions
     path("transactions/", transaction.transaction_lists, name="transactions"),
     path("transaction-detail/<transaction_id>", transaction.transaction_detail, name="transaction-detail"),
+    path("statement/", statement.statement_export, name="statement"),
+
+    # Direct uploads
+    path("uploads/sign/", direct_uploads.sign_upload, name="direct-upload-sign"),
+    path("uploads/local/<str:token>/", direct_uploads.local_upload, name="direct-upload-local"),
+    path("uploads/confirm/", direct_uploads.confirm_upload, name="direct-upload-confirm"),
 
     # Payment Request
     path("request-search-account/", payment_request.SearchUsersRequest, name="request-search-account"),
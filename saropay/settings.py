@@ -79,6 +79,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core_apps.account.context.UserContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -96,6 +97,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core_apps.account.context.user_context',
             ],
         },
     },
@@ -131,6 +133,25 @@ else:
     }
 
 
+# Cache
+# Heroku Redis sets REDIS_URL; a shared cache lets one process's invalidation reach the others.
+# Without it each process keeps its own in-memory cache.
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "saropay",
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -175,6 +196,11 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Stream uploads to disk a chunk at a time with size and type limits
+FILE_UPLOAD_HANDLERS = [
+    'core_apps.core.uploadhandlers.BoundedUploadHandler',
+]
+
 # STORAGES = {
 #     # Enable WhiteNoise's GZip and Brotli compression of static assets:
 #     # https://whitenoise.readthedocs.io/en/latest/django.html#add-compression-and-caching-support
@@ -194,6 +220,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'userauths.User'
 
+# Sessions load the user with KYC, Account and Debt joined in. ModelBackend
+# stays listed so sessions started before the switch remain valid.
+AUTHENTICATION_BACKENDS = [
+    'core_apps.account.context.UserContextBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 ADMIN_URL = 'access2023/'
 
 JAZZMIN_SETTINGS = {
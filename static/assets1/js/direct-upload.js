@@ -0,0 +1,124 @@
+// Send files chosen in [data-direct-upload] inputs straight to storage.
+// The form then submits a signed <name>_key instead of the file itself;
+// without JavaScript the file is posted with the form as before.
+(function () {
+    "use strict";
+
+    function csrfToken(form) {
+        var input = form.querySelector("[name=csrfmiddlewaretoken]");
+        return input ? input.value : "";
+    }
+
+    function postForm(url, fields, csrf) {
+        var body = new FormData();
+        Object.keys(fields).forEach(function (name) {
+            body.append(name, fields[name]);
+        });
+        return fetch(url, {
+            method: "POST",
+            body: body,
+            credentials: "same-origin",
+            headers: csrf ? { "X-CSRFToken": csrf } : {},
+        });
+    }
+
+    function json(response) {
+        return response.json().catch(function () { return {}; }).then(function (data) {
+            if (!response.ok) {
+                throw new Error(data.error || "Upload failed, please try again.");
+            }
+            return data;
+        });
+    }
+
+    function keyInput(input) {
+        var name = input.name + "_key";
+        var hidden = input.form.querySelector('input[name="' + name + '"]');
+        if (!hidden) {
+            hidden = document.createElement("input");
+            hidden.type = "hidden";
+            hidden.name = name;
+            input.form.appendChild(hidden);
+        }
+        return hidden;
+    }
+
+    function statusLine(input) {
+        var status = input.parentNode.querySelector(".direct-upload-status");
+        if (!status) {
+            status = document.createElement("small");
+            status.className = "direct-upload-status d-block mt-1";
+            input.insertAdjacentElement("afterend", status);
+        }
+        return status;
+    }
+
+    function upload(input) {
+        var file = input.files[0];
+        var hidden = keyInput(input);
+        var status = statusLine(input);
+        var csrf = csrfToken(input.form);
+        hidden.value = "";
+        delete input.dataset.uploaded;
+        if (!file) {
+            status.textContent = "";
+            return;
+        }
+
+        input.dataset.uploading = "1";
+        status.textContent = "Uploading...";
+        var key;
+        postForm(input.dataset.directUpload, {
+            field: input.name,
+            name: file.name,
+            size: file.size,
+            content_type: file.type,
+        }, csrf)
+            .then(json)
+            .then(function (target) {
+                key = target.key;
+                var fields = Object.assign({}, target.fields, { file: file });
+                // Presigned S3 POSTs must not carry the CSRF header
+                var sameOrigin = new URL(target.url, window.location.href).origin === window.location.origin;
+                return postForm(target.url, fields, sameOrigin ? csrf : "");
+            })
+            .then(function (response) {
+                if (!response.ok) {
+                    return json(response);
+                }
+            })
+            .then(function () {
+                return postForm(input.dataset.directUploadConfirm, { key: key }, csrf).then(json);
+            })
+            .then(function () {
+                hidden.value = key;
+                input.dataset.uploaded = "1";
+                input.removeAttribute("required");
+                status.textContent = "Uploaded.";
+            })
+            .catch(function (error) {
+                status.textContent = error.message;
+            })
+            .finally(function () {
+                delete input.dataset.uploading;
+            });
+    }
+
+    document.querySelectorAll("input[type=file][data-direct-upload]").forEach(function (input) {
+        input.addEventListener("change", function () { upload(input); });
+    });
+
+    document.querySelectorAll("form").forEach(function (form) {
+        form.addEventListener("submit", function (event) {
+            if (form.querySelector("input[data-direct-upload][data-uploading]")) {
+                event.preventDefault();
+                alert("Please wait for your files to finish uploading.");
+                return;
+            }
+            // Uploaded files are already in storage; only their keys are sent
+            form.querySelectorAll("input[data-direct-upload][data-uploaded]").forEach(function (input) {
+                input.disabled = true;
+            });
+        });
+    });
+})();